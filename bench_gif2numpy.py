@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of gif2numpy on a synthetic gif corpus and on the images in Images/
+
+Every case is timed by stage (parse, lzw, palette, composite) and in total, the throughput
+is given in MPixel/s and the peak memory of convert in MB. The frames are encoded again with
+numpy2gif to compare the encoding throughput with decoding. The import of gif2numpy is
+timed in a fresh interpreter, next to the import of numpy alone. The results are written to a
+JSON file which can be compared with the results of an earlier run to flag regressions:
+
+    python bench_gif2numpy.py -o baseline.json
+    python bench_gif2numpy.py -o current.json --baseline baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import argparse
+import subprocess
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+import gif2numpy
+import numpy2gif
+
+SIZES = (64, 64), (256, 256), (512, 512)
+FRAME_COUNTS = 1, 10
+PALETTE_SIZES = 2, 16, 256
+SAMPLE_IMAGES = "Images/hopper.gif", "Images/audrey.gif", "Images/Rotating_earth.gif", "Images/testcolors.gif"
+
+#================================================================
+# Synthetic gif images
+#================================================================
+def interlace_rows(height):
+    '''returns the row numbers in the order of an interlaced gif image'''
+    return list(range(0, height, 8)) + list(range(4, height, 8)) + list(range(2, height, 4)) + list(range(1, height, 2))
+
+def write_gif(gif_filename, images, palette, interlaced=False, delay_time=10):
+    '''writes a gif file with the palette (N, 3) and the images given as (left, top, indices)
+       all images after the first use palette index 0 as transparent color'''
+    height, width = images[0][2].shape
+    bits = max(int(np.ceil(np.log2(len(palette)))), 1)
+    table = np.zeros((2 << (bits - 1), 3), dtype=np.uint8)
+    table[:len(palette)] = palette
+    lzw_min = max(bits, 2)
+    out = bytearray(b"GIF89a")
+    out += struct.pack("<HHBBB", width, height, 0x80 | (bits - 1), 0, 0)
+    out += table.tobytes()
+    if len(images) > 1:
+        out += b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00"
+    for i, (left, top, indices) in enumerate(images):
+        out += struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 1 if i else 0, delay_time, 0, 0)
+        h, w = indices.shape
+        out += struct.pack("<BHHHHB", 0x2C, left, top, w, h, 0x40 if interlaced else 0)
+        if interlaced:
+            indices = indices[interlace_rows(h)]
+        data = numpy2gif.lzw_compress(indices.ravel().tolist(), lzw_min)
+        out.append(lzw_min)
+        out += numpy2gif.pack_subblocks(data)
+    out.append(0x3B)
+    with open(gif_filename, "wb") as gif_file:
+        gif_file.write(out)
+
+def synthetic_images(width, height, frame_count, palette_size, seed=0):
+    '''returns palette and images of a reproducible animation: a noisy gradient as first frame
+       and a moving sprite with transparent border on a quarter of the canvas as later frames'''
+    rng = np.random.RandomState(seed)
+    palette = rng.randint(0, 256, size=(palette_size, 3)).astype(np.uint8)
+    y, x = np.mgrid[0:height, 0:width]
+    first = ((x + y) * palette_size // (width + height) + rng.randint(0, 2, size=(height, width))) % palette_size
+    images = [(0, 0, first.astype(np.uint8))]
+    h, w = max(height // 2, 1), max(width // 2, 1)
+    for i in range(1, frame_count):
+        sprite = ((x[:h, :w] * 3 + i) % palette_size).astype(np.uint8)
+        sprite[:, :max(w // 8, 1)] = 0
+        images.append(((i * 7) % (width - w + 1), (i * 5) % (height - h + 1), sprite))
+    return palette, images
+
+def synthetic_corpus(directory, quick=False):
+    '''writes the synthetic gif images to directory and returns a list of (case name, file name)'''
+    cases = []
+    sizes = SIZES[:2] if quick else SIZES
+    for width, height in sizes:
+        for frame_count in FRAME_COUNTS:
+            for palette_size in PALETTE_SIZES:
+                for interlaced in (False, True):
+                    name = "%dx%d_f%d_p%d_%s" % (width, height, frame_count, palette_size,
+                                                  "interlaced" if interlaced else "progressive")
+                    gif_filename = os.path.join(directory, name + ".gif")
+                    palette, images = synthetic_images(width, height, frame_count, palette_size)
+                    write_gif(gif_filename, images, palette, interlaced)
+                    cases.append((name, gif_filename))
+    return cases
+
+#================================================================
+# Timing
+#================================================================
+def best_time(func, repeat):
+    '''returns the shortest wall time of repeat calls of func'''
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def decode_stages(raw):
+    '''runs the frame decoder on already decompressed blocks, the palette and compositing stages'''
+    scanner = gif2numpy.BlockScanner(raw)
+    blocks = list(scanner.iter_blocks())
+    for label, offset, value in blocks:
+        if label == "image":
+            value.indices = gif2numpy.lzw_decode(value.data, value.lzw_min, value.width*value.height)
+    return scanner, blocks
+
+def bench_case(gif_filename, repeat):
+    '''times the stages of the conversion of gif_filename and returns them as dict'''
+    with open(gif_filename, "rb") as gif_file:
+        raw = gif_file.read()
+    scanner, blocks = decode_stages(raw)
+    images = [value for label, offset, value in blocks if label == "image"]
+    screen_width, screen_height = scanner.image_specs["Image Size"]
+    pixels = screen_width * screen_height * len(images)
+    palette = gif2numpy.palette_array(scanner.color_table)
+    result = {"frames": len(images), "pixels": pixels, "bytes": len(raw)}
+    result["parse"] = best_time(lambda: list(gif2numpy.BlockScanner(raw).iter_blocks()), repeat)
+    result["lzw"] = best_time(lambda: [gif2numpy.lzw_decode(image.data, image.lzw_min, image.width*image.height)
+                                       for image in images], repeat)
+    result["palette"] = best_time(lambda: [(gif2numpy.palette_array(image.color_table) if image.has_color_table else palette)
+                                           [image.indices.reshape(image.height, image.width)] for image in images], repeat)
+
+    def composite():
+        decoder = gif2numpy._FrameDecoder(scanner, {})
+        for label, offset, value in blocks:
+            decoder.block(label, offset, value)
+    result["composite"] = max(best_time(composite, repeat) - result["palette"], 0.0)
+    result["total"] = best_time(lambda: gif2numpy.convert(raw), repeat)
+    result["mpixel_s"] = pixels / result["total"] / 1e6
+    frames = gif2numpy.convert(raw)[0]
+    result["encode"] = best_time(lambda: numpy2gif.convert(frames), repeat)
+    result["encode_mpixel_s"] = pixels / result["encode"] / 1e6
+    tracemalloc.start()
+    gif2numpy.convert(raw)
+    result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return result
+
+def import_time(module, repeat):
+    '''returns the shortest wall time of importing module in a fresh interpreter'''
+    code = "import time; start = time.perf_counter(); import %s; print(time.perf_counter() - start)" % module
+    here = os.path.dirname(os.path.abspath(__file__))
+    return min(float(subprocess.check_output([sys.executable, "-c", code], cwd=here)) for i in range(repeat))
+
+def bench_import(repeat):
+    '''times the import of gif2numpy and of numpy, which it needs, and returns them as dict'''
+    result = {"import": import_time("gif2numpy", repeat), "import_numpy": import_time("numpy", repeat)}
+    result["import_own"] = max(result["import"] - result["import_numpy"], 0.0)
+    return result
+
+def compare(results, baseline, threshold):
+    '''returns the list of (case, stage, baseline time, time) slower than the baseline by more than threshold'''
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        for stage in ("parse", "lzw", "palette", "composite", "total", "encode", "import"):
+            old = baseline[name].get(stage)
+            new = result.get(stage)
+            # stages below a millisecond are too noisy to compare
+            if old is not None and new is not None and max(old, new) > 1e-3 and new > old * (1 + threshold):
+                regressions.append((name, stage, old, new))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark of gif2numpy")
+    parser.add_argument("-o", "--output", default="bench_gif2numpy.json", help="JSON file for the results")
+    parser.add_argument("-b", "--baseline", help="JSON file of an earlier run to compare with")
+    parser.add_argument("-t", "--threshold", type=float, default=0.2, help="relative slowdown flagged as regression")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="runs per measurement, the best is taken")
+    parser.add_argument("--quick", action="store_true", help="leave out the largest synthetic images")
+    args = parser.parse_args(argv)
+    directory = tempfile.mkdtemp(prefix="bench_gif2numpy")
+    cases = synthetic_corpus(directory, args.quick)
+    here = os.path.dirname(os.path.abspath(__file__))
+    cases += [(os.path.basename(name), os.path.join(here, name)) for name in SAMPLE_IMAGES]
+    results = {}
+    result = results["import"] = bench_import(max(args.repeat, 5))
+    print("import gif2numpy %.4f s, numpy %.4f s, gif2numpy alone %.4f s" % (result["import"],
+          result["import_numpy"], result["import_own"]))
+    print("%-36s %6s %9s %9s %9s %9s %9s %9s %8s %9s %9s" % ("case", "frames", "parse", "lzw", "palette",
+          "composite", "total", "MPixel/s", "peak MB", "encode", "MPixel/s"))
+    for name, gif_filename in cases:
+        result = results[name] = bench_case(gif_filename, args.repeat)
+        print("%-36s %6d %9.4f %9.4f %9.4f %9.4f %9.4f %9.2f %8.1f %9.4f %9.2f" % (name, result["frames"],
+              result["parse"], result["lzw"], result["palette"], result["composite"], result["total"],
+              result["mpixel_s"], result["peak_mb"], result["encode"], result["encode_mpixel_s"]))
+    for name, gif_filename in cases:
+        if gif_filename.startswith(directory):
+            os.remove(gif_filename)
+    os.rmdir(directory)
+    report = {"python": platform.python_version(), "numpy": np.__version__, "gif2numpy": gif2numpy.version,
+              "results": results}
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=1, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline)["results"], args.threshold)
+        for name, stage, old, new in regressions:
+            print("REGRESSION %s %s: %.4f s -> %.4f s" % (name, stage, old, new))
+        if regressions:
+            return 1
+        print("no regressions against", args.baseline)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
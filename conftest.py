@@ -0,0 +1,59 @@
+import glob
+import os
+import struct
+import numpy as np
+import pytest
+import numpy2gif
+
+# test_gif2numpy.py is an interactive viewer which needs cv2 and a display,
+# the automated tests are in tests/
+collect_ignore = ["test_gif2numpy.py"]
+
+IMAGES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Images", "*.gif")))
+
+PALETTE = np.array([[0, 0, 0], [255, 0, 0], [0, 255, 0], [0, 0, 255]], dtype=np.uint8)
+
+
+def make_gif(images, palette=PALETTE, screen=(8, 8)):
+    """writes a gif with a global color table, images are tuples (left, top, indices, gce)
+       with gce None or (disposal, transparent flag, transparent index)"""
+    out = [numpy2gif.header(), numpy2gif.logical_screen(screen[0], screen[1], 2), palette.tobytes()]
+    for left, top, indices, gce in images:
+        if gce is not None:
+            disposal, flag, transparent_idx = gce
+            out.append(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, (disposal << 2) | flag, 10, transparent_idx, 0))
+        out.append(numpy2gif.image(np.asarray(indices, dtype=np.uint8), 2, left, top))
+    out.append(numpy2gif.trailer())
+    return b"".join(out)
+
+
+def disposal_gif():
+    """frames with every disposal method, a full opaque frame restoring the screen after it
+       and frames without graphic control extension after frames with one"""
+    full = np.arange(64).reshape(8, 8) % 4
+    sprite = np.full((4, 4), 2)
+    sprite[1:3, 1:3] = 0
+    return make_gif([
+        (0, 0, full, (1, 0, 0)),
+        (2, 2, sprite, (1, 1, 0)),
+        (0, 0, 3 - full, (3, 0, 0)),
+        (1, 3, sprite, (2, 1, 0)),
+        (4, 0, sprite, None),
+        (0, 0, full, None),
+        (3, 3, sprite, (3, 1, 0)),
+        (0, 1, sprite, None),
+        (0, 0, 3 - full, (0, 0, 0)),
+        (2, 4, sprite, (0, 1, 0)),
+    ])
+
+
+@pytest.fixture(params=IMAGES, ids=os.path.basename)
+def gif_filename(request):
+    "the file name of each gif in Images/"
+    return request.param
+
+
+@pytest.fixture(params=[disposal_gif()] + IMAGES, ids=["disposal"] + [os.path.basename(name) for name in IMAGES])
+def gif_source(request):
+    "the synthetic disposal gif as bytes and the file name of each gif in Images/"
+    return request.param
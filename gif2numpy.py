@@ -4,10 +4,13 @@
 from __future__ import print_function
 import numpy as np
 import os
-from pkg_resources import parse_version
-from kaitaistruct import __version__ as ks_version, KaitaiStruct, KaitaiStream, BytesIO
-from enum import Enum
-from builtins import bytes
+import sys
+import mmap
+import time
+import copy
+import struct
+from collections import deque, OrderedDict
+from contextlib import contextmanager
 version = "1.3"
 
 """
@@ -19,79 +22,67 @@ Version history:
 1.0: first release just for still single images
 """
 
-if parse_version(ks_version) < parse_version('0.7'):
-    raise Exception("Incompatible Kaitai Struct Python API: 0.7 or later is required, but you have %s" % (ks_version))
-
-class Gif(KaitaiStruct):
-    """GIF (Graphics Interchange Format) is an image file format, developed
-    in 1987. It became popular in 1990s as one of the main image formats
-    used in World Wide Web.
-    
-    GIF format allows encoding of palette-based images up to 256 colors
-    (each of the colors can be chosen from a 24-bit RGB
-    colorspace). Image data stream uses LZW (Lempel–Ziv–Welch) lossless
-    compression.
-    
-    Over the years, several version of the format were published and
-    several extensions to it were made, namely, a popular Netscape
-    extension that allows to store several images in one file, switching
-    between them, which produces crude form of animation.
-    
-    Structurally, format consists of several mandatory headers and then
-    a stream of blocks follows. Blocks can carry additional
-    metainformation or image data.
-    """
-
-    class BlockType(Enum):
-        extension = 33
-        local_image_descriptor = 44
-        end_of_file = 59
-
-    class ExtensionLabel(Enum):
-        graphic_control = 249
-        comment = 254
-        application = 255
-
-    def __init__(self, _io, _parent=None, _root=None):
-        self._io = _io
-        self._parent = _parent
-        self._root = _root if _root else self
-        self._read()
-
-    def _read(self):
-        self.hdr = self._root.Header(self._io, self, self._root)
-        self.logical_screen_descriptor = self._root.LogicalScreenDescriptorStruct(self._io, self, self._root)
-        if self.logical_screen_descriptor.has_color_table:
-            self._raw_global_color_table = self._io.read_bytes((self.logical_screen_descriptor.color_table_size * 3))
-            io = KaitaiStream(BytesIO(self._raw_global_color_table))
-            self.global_color_table = self._root.ColorTable(io, self, self._root)
-
-        self.blocks = []
-        i = 0
-        while True:
-            _ = self._root.Block(self._io, self, self._root)
-            self.blocks.append(_)
-            if  ((self._io.is_eof()) or (_.block_type == self._root.BlockType.end_of_file)) :
+#================================================================
+# Kaitai Struct classes
+#================================================================
+_kaitai = {}
+
+def _version_tuple(version_string):
+    "returns the leading numbers of the version string version_string as tuple of ints"
+    numbers = []
+    for part in version_string.split("."):
+        digits = ""
+        for char in part:
+            if not char.isdigit():
                 break
-            i += 1
-
-    class ImageData(KaitaiStruct):
-        """
-        .. seealso::
-           - section 22 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
+            digits += char
+        if not digits:
+            break
+        numbers.append(int(digits))
+    return tuple(numbers)
+
+def _kaitai_classes():
+    """imports kaitaistruct on first use and returns a dict with the classes Gif and GifStream
+       defined on it and the KaitaiStruct, KaitaiStream and BytesIO of kaitaistruct
+       Importing gif2numpy itself stays light, the Kaitai Struct parser is only needed with
+       parser="kaitai"."""
+    if _kaitai:
+        return _kaitai
+    from kaitaistruct import __version__ as ks_version, KaitaiStruct, KaitaiStream, BytesIO
+    from enum import Enum
+    if _version_tuple(ks_version) < (0, 7):
+        raise Exception("Incompatible Kaitai Struct Python API: 0.7 or later is required, but you have %s" % (ks_version))
+
+    class Gif(KaitaiStruct):
+        """GIF (Graphics Interchange Format) is an image file format, developed
+        in 1987. It became popular in 1990s as one of the main image formats
+        used in World Wide Web.
+
+        GIF format allows encoding of palette-based images up to 256 colors
+        (each of the colors can be chosen from a 24-bit RGB
+        colorspace). Image data stream uses LZW (Lempel–Ziv–Welch) lossless
+        compression.
+
+        Over the years, several version of the format were published and
+        several extensions to it were made, namely, a popular Netscape
+        extension that allows to store several images in one file, switching
+        between them, which produces crude form of animation.
+
+        Structurally, format consists of several mandatory headers and then
+        a stream of blocks follows. Blocks can carry additional
+        metainformation or image data.
         """
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
 
-        def _read(self):
-            self.lzw_min_code_size = self._io.read_u1()
-            self.subblocks = self._root.Subblocks(self._io, self, self._root)
+        class BlockType(Enum):
+            extension = 33
+            local_image_descriptor = 44
+            end_of_file = 59
 
+        class ExtensionLabel(Enum):
+            graphic_control = 249
+            comment = 254
+            application = 255
 
-    class ColorTableEntry(KaitaiStruct):
         def __init__(self, _io, _parent=None, _root=None):
             self._io = _io
             self._parent = _parent
@@ -99,253 +90,313 @@ class Gif(KaitaiStruct):
             self._read()
 
         def _read(self):
-            self.red = self._io.read_u1()
-            self.green = self._io.read_u1()
-            self.blue = self._io.read_u1()
-
-
-    class LogicalScreenDescriptorStruct(KaitaiStruct):
-        """
-        .. seealso::
-           - section 18 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
-        """
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
+            self._read_head()
+            self.blocks = list(self.iter_blocks())
+
+        def _read_head(self):
+            self.hdr = self._root.Header(self._io, self, self._root)
+            self.logical_screen_descriptor = self._root.LogicalScreenDescriptorStruct(self._io, self, self._root)
+            if self.logical_screen_descriptor.has_color_table:
+                self._raw_global_color_table = self._io.read_bytes((self.logical_screen_descriptor.color_table_size * 3))
+                io = KaitaiStream(BytesIO(self._raw_global_color_table))
+                self.global_color_table = self._root.ColorTable(io, self, self._root)
+
+        def iter_blocks(self):
+            """reads the blocks following the headers from the stream and yields them one by one"""
+            while True:
+                _ = self._root.Block(self._io, self, self._root)
+                yield _
+                if  ((self._io.is_eof()) or (_.block_type == self._root.BlockType.end_of_file)) :
+                    break
 
-        def _read(self):
-            self.screen_width = self._io.read_u2le()
-            self.screen_height = self._io.read_u2le()
-            self.flags = self._io.read_u1()
-            self.bg_color_index = self._io.read_u1()
-            self.pixel_aspect_ratio = self._io.read_u1()
-
-        @property
-        def has_color_table(self):
-            if hasattr(self, '_m_has_color_table'):
+        class ImageData(KaitaiStruct):
+            """
+            .. seealso::
+               - section 22 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
+            """
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.lzw_min_code_size = self._io.read_u1()
+                self.subblocks = self._root.Subblocks(self._io, self, self._root)
+
+
+        class ColorTableEntry(KaitaiStruct):
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.red = self._io.read_u1()
+                self.green = self._io.read_u1()
+                self.blue = self._io.read_u1()
+
+
+        class LogicalScreenDescriptorStruct(KaitaiStruct):
+            """
+            .. seealso::
+               - section 18 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
+            """
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.screen_width = self._io.read_u2le()
+                self.screen_height = self._io.read_u2le()
+                self.flags = self._io.read_u1()
+                self.bg_color_index = self._io.read_u1()
+                self.pixel_aspect_ratio = self._io.read_u1()
+
+            @property
+            def has_color_table(self):
+                if hasattr(self, '_m_has_color_table'):
+                    return self._m_has_color_table if hasattr(self, '_m_has_color_table') else None
+
+                self._m_has_color_table = (self.flags & 128) != 0
                 return self._m_has_color_table if hasattr(self, '_m_has_color_table') else None
 
-            self._m_has_color_table = (self.flags & 128) != 0
-            return self._m_has_color_table if hasattr(self, '_m_has_color_table') else None
+            @property
+            def color_table_size(self):
+                if hasattr(self, '_m_color_table_size'):
+                    return self._m_color_table_size if hasattr(self, '_m_color_table_size') else None
 
-        @property
-        def color_table_size(self):
-            if hasattr(self, '_m_color_table_size'):
+                self._m_color_table_size = (2 << (self.flags & 7))
                 return self._m_color_table_size if hasattr(self, '_m_color_table_size') else None
 
-            self._m_color_table_size = (2 << (self.flags & 7))
-            return self._m_color_table_size if hasattr(self, '_m_color_table_size') else None
-
-
-    class LocalImageDescriptor(KaitaiStruct):
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
 
-        def _read(self):
-            self.left = self._io.read_u2le()
-            self.top = self._io.read_u2le()
-            self.width = self._io.read_u2le()
-            self.height = self._io.read_u2le()
-            self.flags = self._io.read_u1()
-            if self.has_color_table:
-                self._raw_local_color_table = self._io.read_bytes((self.color_table_size * 3))
-                io = KaitaiStream(BytesIO(self._raw_local_color_table))
-                self.local_color_table = self._root.ColorTable(io, self, self._root)
-
-            self.image_data = self._root.ImageData(self._io, self, self._root)
-
-        @property
-        def has_color_table(self):
-            if hasattr(self, '_m_has_color_table'):
+        class LocalImageDescriptor(KaitaiStruct):
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.left = self._io.read_u2le()
+                self.top = self._io.read_u2le()
+                self.width = self._io.read_u2le()
+                self.height = self._io.read_u2le()
+                self.flags = self._io.read_u1()
+                if self.has_color_table:
+                    self._raw_local_color_table = self._io.read_bytes((self.color_table_size * 3))
+                    io = KaitaiStream(BytesIO(self._raw_local_color_table))
+                    self.local_color_table = self._root.ColorTable(io, self, self._root)
+
+                self.image_data = self._root.ImageData(self._io, self, self._root)
+
+            @property
+            def has_color_table(self):
+                if hasattr(self, '_m_has_color_table'):
+                    return self._m_has_color_table if hasattr(self, '_m_has_color_table') else None
+
+                self._m_has_color_table = (self.flags & 128) != 0
                 return self._m_has_color_table if hasattr(self, '_m_has_color_table') else None
 
-            self._m_has_color_table = (self.flags & 128) != 0
-            return self._m_has_color_table if hasattr(self, '_m_has_color_table') else None
+            @property
+            def has_interlace(self):
+                if hasattr(self, '_m_has_interlace'):
+                    return self._m_has_interlace if hasattr(self, '_m_has_interlace') else None
 
-        @property
-        def has_interlace(self):
-            if hasattr(self, '_m_has_interlace'):
+                self._m_has_interlace = (self.flags & 64) != 0
                 return self._m_has_interlace if hasattr(self, '_m_has_interlace') else None
 
-            self._m_has_interlace = (self.flags & 64) != 0
-            return self._m_has_interlace if hasattr(self, '_m_has_interlace') else None
+            @property
+            def has_sorted_color_table(self):
+                if hasattr(self, '_m_has_sorted_color_table'):
+                    return self._m_has_sorted_color_table if hasattr(self, '_m_has_sorted_color_table') else None
 
-        @property
-        def has_sorted_color_table(self):
-            if hasattr(self, '_m_has_sorted_color_table'):
+                self._m_has_sorted_color_table = (self.flags & 32) != 0
                 return self._m_has_sorted_color_table if hasattr(self, '_m_has_sorted_color_table') else None
 
-            self._m_has_sorted_color_table = (self.flags & 32) != 0
-            return self._m_has_sorted_color_table if hasattr(self, '_m_has_sorted_color_table') else None
+            @property
+            def color_table_size(self):
+                if hasattr(self, '_m_color_table_size'):
+                    return self._m_color_table_size if hasattr(self, '_m_color_table_size') else None
 
-        @property
-        def color_table_size(self):
-            if hasattr(self, '_m_color_table_size'):
+                self._m_color_table_size = (2 << (self.flags & 7))
                 return self._m_color_table_size if hasattr(self, '_m_color_table_size') else None
 
-            self._m_color_table_size = (2 << (self.flags & 7))
-            return self._m_color_table_size if hasattr(self, '_m_color_table_size') else None
 
-
-    class Block(KaitaiStruct):
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
-
-        def _read(self):
-            self.block_type = self._root.BlockType(self._io.read_u1())
-            _on = self.block_type
-            if _on == self._root.BlockType.extension:
-                self.body = self._root.Extension(self._io, self, self._root)
-            elif _on == self._root.BlockType.local_image_descriptor:
-                self.body = self._root.LocalImageDescriptor(self._io, self, self._root)
-
-
-    class ColorTable(KaitaiStruct):
-        """
-        .. seealso::
-           - section 19 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
-        """
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
-
-        def _read(self):
-            self.entries = []
-            i = 0
-            while not self._io.is_eof():
-                self.entries.append(self._root.ColorTableEntry(self._io, self, self._root))
-                i += 1
-
-
-
-    class Header(KaitaiStruct):
-        """
-        .. seealso::
-           - section 17 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
-        """
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
-
-        def _read(self):
-            self.magic = self._io.ensure_fixed_contents(b"\x47\x49\x46")
-            self.version = (self._io.read_bytes(3)).decode(u"ASCII")
-
-
-    class ExtGraphicControl(KaitaiStruct):
-        """
-        .. seealso::
-           - section 23 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
-        """
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
-
-        def _read(self):
-            self.block_size = self._io.ensure_fixed_contents(b"\x04")
-            self.flags = self._io.read_u1()
-            self.delay_time = self._io.read_u2le()
-            self.transparent_idx = self._io.read_u1()
-            self.terminator = self._io.ensure_fixed_contents(b"\x00")
-
-        @property
-        def transparent_color_flag(self):
-            if hasattr(self, '_m_transparent_color_flag'):
+        class Block(KaitaiStruct):
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.block_type = self._root.BlockType(self._io.read_u1())
+                _on = self.block_type
+                if _on == self._root.BlockType.extension:
+                    self.body = self._root.Extension(self._io, self, self._root)
+                elif _on == self._root.BlockType.local_image_descriptor:
+                    self.body = self._root.LocalImageDescriptor(self._io, self, self._root)
+
+
+        class ColorTable(KaitaiStruct):
+            """
+            .. seealso::
+               - section 19 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
+            """
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.entries = []
+                i = 0
+                while not self._io.is_eof():
+                    self.entries.append(self._root.ColorTableEntry(self._io, self, self._root))
+                    i += 1
+
+
+
+        class Header(KaitaiStruct):
+            """
+            .. seealso::
+               - section 17 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
+            """
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.magic = self._io.ensure_fixed_contents(b"\x47\x49\x46")
+                self.version = (self._io.read_bytes(3)).decode(u"ASCII")
+
+
+        class ExtGraphicControl(KaitaiStruct):
+            """
+            .. seealso::
+               - section 23 - https://www.w3.org/Graphics/GIF/spec-gif89a.txt
+            """
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.block_size = self._io.ensure_fixed_contents(b"\x04")
+                self.flags = self._io.read_u1()
+                self.delay_time = self._io.read_u2le()
+                self.transparent_idx = self._io.read_u1()
+                self.terminator = self._io.ensure_fixed_contents(b"\x00")
+
+            @property
+            def transparent_color_flag(self):
+                if hasattr(self, '_m_transparent_color_flag'):
+                    return self._m_transparent_color_flag if hasattr(self, '_m_transparent_color_flag') else None
+
+                self._m_transparent_color_flag = (self.flags & 1) != 0
                 return self._m_transparent_color_flag if hasattr(self, '_m_transparent_color_flag') else None
 
-            self._m_transparent_color_flag = (self.flags & 1) != 0
-            return self._m_transparent_color_flag if hasattr(self, '_m_transparent_color_flag') else None
+            @property
+            def user_input_flag(self):
+                if hasattr(self, '_m_user_input_flag'):
+                    return self._m_user_input_flag if hasattr(self, '_m_user_input_flag') else None
 
-        @property
-        def user_input_flag(self):
-            if hasattr(self, '_m_user_input_flag'):
+                self._m_user_input_flag = (self.flags & 2) != 0
                 return self._m_user_input_flag if hasattr(self, '_m_user_input_flag') else None
 
-            self._m_user_input_flag = (self.flags & 2) != 0
-            return self._m_user_input_flag if hasattr(self, '_m_user_input_flag') else None
-
-
-    class Subblock(KaitaiStruct):
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
-
-        def _read(self):
-            self.num_bytes = self._io.read_u1()
-            self.bytes = self._io.read_bytes(self.num_bytes)
-
-
-    class ExtApplication(KaitaiStruct):
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
-
-        def _read(self):
-            self.application_id = self._root.Subblock(self._io, self, self._root)
-            self.subblocks = []
-            i = 0
-            while True:
-                _ = self._root.Subblock(self._io, self, self._root)
-                self.subblocks.append(_)
-                if _.num_bytes == 0:
-                    break
-                i += 1
 
+        class Subblock(KaitaiStruct):
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.num_bytes = self._io.read_u1()
+                self.bytes = self._io.read_bytes(self.num_bytes)
+
+
+        class ExtApplication(KaitaiStruct):
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.application_id = self._root.Subblock(self._io, self, self._root)
+                self.subblocks = []
+                i = 0
+                while True:
+                    _ = self._root.Subblock(self._io, self, self._root)
+                    self.subblocks.append(_)
+                    if _.num_bytes == 0:
+                        break
+                    i += 1
+
+
+        class Subblocks(KaitaiStruct):
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.entries = []
+                i = 0
+                while True:
+                    _ = self._root.Subblock(self._io, self, self._root)
+                    self.entries.append(_)
+                    if _.num_bytes == 0:
+                        break
+                    i += 1
+
+
+        class Extension(KaitaiStruct):
+            def __init__(self, _io, _parent=None, _root=None):
+                self._io = _io
+                self._parent = _parent
+                self._root = _root if _root else self
+                self._read()
+
+            def _read(self):
+                self.label = self._root.ExtensionLabel(self._io.read_u1())
+                _on = self.label
+                if _on == self._root.ExtensionLabel.application:
+                    self.body = self._root.ExtApplication(self._io, self, self._root)
+                elif _on == self._root.ExtensionLabel.comment:
+                    self.body = self._root.Subblocks(self._io, self, self._root)
+                elif _on == self._root.ExtensionLabel.graphic_control:
+                    self.body = self._root.ExtGraphicControl(self._io, self, self._root)
+                else:
+                    self.body = self._root.Subblocks(self._io, self, self._root)
 
-    class Subblocks(KaitaiStruct):
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
+    class GifStream(Gif):
+        """Gif which only reads the headers and the global color table on construction,
+        the blocks are then read incrementally with iter_blocks so that only one block
+        of the stream is held in memory at a time"""
 
         def _read(self):
-            self.entries = []
-            i = 0
-            while True:
-                _ = self._root.Subblock(self._io, self, self._root)
-                self.entries.append(_)
-                if _.num_bytes == 0:
-                    break
-                i += 1
+            self._read_head()
 
+    _kaitai.update(Gif=Gif, GifStream=GifStream, KaitaiStruct=KaitaiStruct, KaitaiStream=KaitaiStream, BytesIO=BytesIO)
+    return _kaitai
 
-    class Extension(KaitaiStruct):
-        def __init__(self, _io, _parent=None, _root=None):
-            self._io = _io
-            self._parent = _parent
-            self._root = _root if _root else self
-            self._read()
-
-        def _read(self):
-            self.label = self._root.ExtensionLabel(self._io.read_u1())
-            _on = self.label
-            if _on == self._root.ExtensionLabel.application:
-                self.body = self._root.ExtApplication(self._io, self, self._root)
-            elif _on == self._root.ExtensionLabel.comment:
-                self.body = self._root.Subblocks(self._io, self, self._root)
-            elif _on == self._root.ExtensionLabel.graphic_control:
-                self.body = self._root.ExtGraphicControl(self._io, self, self._root)
-            else:
-                self.body = self._root.Subblocks(self._io, self, self._root)
+def __getattr__(name):
+    "gives gif2numpy.Gif, gif2numpy.GifStream and the kaitaistruct classes on first access"
+    if name in ("Gif", "GifStream", "KaitaiStruct", "KaitaiStream", "BytesIO"):
+        return _kaitai_classes()[name]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 #================================================================
 # Bit-level operations
@@ -417,23 +468,61 @@ class BitReader(object):
         self._ptr = (byte_end << 3) | end
         return bit_str
 
-def cvtColor(image):
-    "converts color from BGR to RGB and BGRA to RGBA and vice versa"
-    if len(image.shape)>=3:
-        np8_image = image.astype(np.uint8)
-        if image.shape[2] == 3:
-            b, g, r = np.dsplit(np8_image, np8_image.shape[-1])
-            return np.dstack([r, g, b])
-        elif image.shape[2] == 4:
-            b, g, r, a = np.dsplit(np8_image, np8_image.shape[-1])
-            return np.dstack([r, g, b, a])
-    return image
+class CodeReader(object):
+    '''Reads runs of codes of the same bit size from a byte string at once
+
+    For every byte the little-endian 24 bit word starting there is precomputed, each code of
+    up to 12 bits at any bit position lies within one of these words. A run of codes is
+    extracted by one vectorized gather, shift and mask. BitReader reads one code at a time.'''
+
+    __slots__ = [
+        "_words",
+        "_ptr",
+        "_len",
+    ]
+
+    def __init__(self, byte_string):
+        '''Initialize the reader with a complete byte string'''
+        data = np.frombuffer(bytes(byte_string) + b"\0\0", dtype=np.uint8).astype(np.uint32)
+        self._words = data[:-2] | (data[1:-1] << 8) | (data[2:] << 16)
+        self._ptr = 0
+        self._len = len(byte_string) * 8
+
+    def read_run(self, amount, count):
+        '''Read up to count codes of amount bits, fewer at the end of the byte string, and
+           returns them as list of ints, missing bits of the last code are 0'''
+        count = min(count, -(-(self._len - self._ptr) // amount))
+        bits = self._ptr + amount * np.arange(count, dtype=np.intp)
+        self._ptr += amount * count
+        return ((self._words[bits >> 3] >> (bits & 7).astype(np.uint32)) & ((1 << amount) - 1)).tolist()
+
+def cvtColor(image, out=None):
+    """converts color from BGR to RGB and BGRA to RGBA and vice versa
+       The result is written to the uint8 array out if given, which may be image itself to convert
+       in place, otherwise to a new uint8 array. Frames of convert need no conversion, the
+       channel order is already set in their palettes by BGR2RGB."""
+    if len(image.shape) < 3 or image.shape[2] not in (3, 4):
+        if out is None:
+            return image
+        out[...] = image
+        return out
+    if out is None:
+        out = np.empty(image.shape, dtype=np.uint8)
+    # only the first channel is kept aside if out overlaps image
+    first = image[..., 0].copy() if np.may_share_memory(image, out) else image[..., 0]
+    out[..., 0] = image[..., 2]
+    if out is not image:
+        out[..., 1] = image[..., 1]
+        out[..., 3:] = image[..., 3:]
+    out[..., 2] = first
+    return out
 
 #================================================================
 # LZW compression algorithms
 #================================================================
-def lzw_decompress(raw_bytes, lzw_min):
-    '''Decompress the LZW data and yields output'''
+def lzw_decompress(raw_bytes, lzw_min, size=None):
+    '''Decompress the LZW data and yields output, at most size indices if size is given'''
+    _check_lzw_min(lzw_min)
     #Initialize streams
     code_in = BitReader(raw_bytes)
     idx_out = []
@@ -446,7 +535,7 @@ def lzw_decompress(raw_bytes, lzw_min):
     code_table_len = END + 1
     #Begin reading codes
     code_last = -1
-    while code_last != END:
+    while code_last != END and (size is None or len(idx_out) < size):
         #Get the next code id
         code_id = code_in.read(bit_size)
         #Check the next code
@@ -480,8 +569,163 @@ def lzw_decompress(raw_bytes, lzw_min):
         if code_last not in (-1, CLEAR, END):
             code_table.append(code_table[code_last] + k)
         code_last = code_id
+    if size is not None:
+        del idx_out[size:]
     return idx_out
 
+def _check_lzw_min(lzw_min):
+    "raises ValueError for an LZW minimum code size whose codes would exceed 12 bits"
+    if not 0 <= lzw_min <= 11:
+        raise ValueError("Invalid LZW minimum code size %d" % lzw_min)
+
+def lzw_decode(raw_bytes, lzw_min, size, counts=None):
+    '''Decompress the LZW data into a preallocated uint8 index buffer of length size
+       The code table is kept as offset/length arrays into the output buffer: every
+       string of the table has already been written there once, so each code is
+       emitted by a single slice copy instead of concatenating tuples
+       If a dict counts is given, the number of codes read and of clear codes is set in it.'''
+    for indices in lzw_decode_iter(raw_bytes, lzw_min, size, counts=counts):
+        pass
+    return indices
+
+def lzw_decode_iter(raw_bytes, lzw_min, size, stops=(), counts=None):
+    '''Decompress the LZW data as lzw_decode, but yields the index buffer of length size
+       each time the output reaches one of the ascending positions stops and at the end,
+       only the indices before the stop are decoded in the buffers yielded early'''
+    _check_lzw_min(lzw_min)
+    #Initialize streams
+    code_in = CodeReader(raw_bytes)
+    #The slack behind size takes the tail of the last string, which may overrun
+    out = bytearray(size + 4096)
+    offsets = [0] * 4096
+    lengths = [0] * 4096
+    #Set up bit reading
+    bit_size = lzw_min + 1
+    bit_inc = (1 << (bit_size)) - 1
+    #Initialize special codes
+    CLEAR = 1 << lzw_min
+    END = CLEAR + 1
+    code_len = END + 1
+    #Begin reading codes
+    pos = 0
+    last_pos = last_len = -1
+    #Codes are counted by the table entries they add, only the others in the loop
+    clears = added = other = 0
+    indices = np.frombuffer(out, dtype=np.uint8, count=size)
+    for stop in tuple(stops) + (size,):
+        while pos < stop and code_in._ptr < code_in._len:
+            #Read the codes up to the next possible change of the bit size at once, with a
+            #minimum code size below 2 the table starts beyond it and the size never changes
+            run_size = bit_size
+            run_start = code_in._ptr
+            used = 0
+            for code_id in code_in.read_run(bit_size, max(bit_inc - code_len + 1, 1) if bit_size < 12 else 4096):
+                used += 1
+                #Check the next code
+                if code_id == CLEAR:
+                    #Reset size readers and the code table
+                    clears += 1
+                    added += code_len - END - 1
+                    bit_size = lzw_min + 1
+                    bit_inc = (1 << (bit_size)) - 1
+                    code_len = END + 1
+                    last_pos = last_len = -1
+                    break
+                elif code_id == END:
+                    #End parsing
+                    other += 1
+                    run_start = code_in._len
+                    break
+                elif code_id < CLEAR:
+                    #Root code - output the index itself
+                    out[pos] = code_id
+                    length = 1
+                elif code_id < code_len:
+                    #Table has code_id - copy its string from the output
+                    length = lengths[code_id]
+                    start = offsets[code_id]
+                    out[pos:pos+length] = out[start:start+length]
+                elif last_len > 0:
+                    #Code not in table - previous string plus its first index
+                    length = last_len + 1
+                    out[pos:pos+last_len] = out[last_pos:last_pos+last_len]
+                    out[pos+last_len] = out[last_pos]
+                else:
+                    #Unknown code without a previous string, skip it
+                    continue
+                #Check increasing the bit size, which happens only at the last code of a run
+                if code_len == bit_inc and bit_size < 12:
+                    bit_size += 1
+                    bit_inc = (1 << (bit_size)) - 1
+                #Update the code table with previous + k, which directly precedes pos
+                if last_len > 0 and code_len < 4096:
+                    offsets[code_len] = last_pos
+                    lengths[code_len] = last_len + 1
+                    code_len += 1
+                else:
+                    other += 1
+                last_pos = pos
+                last_len = length
+                pos += length
+                if pos >= stop:
+                    break
+            #Continue behind the last code used, the rest of the run is read again
+            code_in._ptr = min(run_start + used * run_size, code_in._len)
+        if counts is not None:
+            counts["codes"] = clears + added + code_len - END - 1 + other
+            counts["clears"] = clears
+        yield indices
+
+#================================================================
+# Interlacing
+#================================================================
+# row permutations by (height, rows) in least recently used order, bounded so that decoding
+# files of arbitrary heights does not grow it without limit
+_deinterlace_cache = OrderedDict()
+_deinterlace_cache_size = 256
+
+def interlace_passes(height):
+    '''Returns the number of rows stored after each of the four passes of an interlaced image:
+       every 8th row from row 0, every 8th row from row 4, every 4th from row 2, every 2nd from row 1'''
+    passes = len(range(0, height, 8)), len(range(4, height, 8)), len(range(2, height, 4)), len(range(1, height, 2))
+    return tuple(np.cumsum(passes).tolist())
+
+def deinterlace_rows(height, rows=None):
+    '''Returns for every row of an interlaced image of height the row it is stored in,
+       so that indices[deinterlace_rows(height)] restores the row order in one gather
+       If only the first rows stored rows are decoded, the rows not decoded yet take
+       the nearest decoded row above them instead.'''
+    key = height, rows
+    if key in _deinterlace_cache:
+        _deinterlace_cache.move_to_end(key)
+        return _deinterlace_cache[key]
+    if rows is None:
+        order = np.concatenate([np.arange(0, height, 8), np.arange(4, height, 8),
+                                np.arange(2, height, 4), np.arange(1, height, 2)])
+        stored = np.empty(height, dtype=np.intp)
+        stored[order] = np.arange(height)
+    else:
+        stored = deinterlace_rows(height)
+        # the first row is always decoded first
+        nearest = np.maximum.accumulate(np.where(stored < rows, np.arange(height), 0))
+        stored = stored[nearest]
+    stored.flags.writeable = False
+    _deinterlace_cache[key] = stored
+    while len(_deinterlace_cache) > _deinterlace_cache_size:
+        _deinterlace_cache.popitem(last=False)
+    return stored
+
+def palette_array(color_table, BGR2RGB=True):
+    """converts a color table given as Gif.ColorTable, as sequence of color tuples or as array
+       once to an (N, 3) uint8 array, which maps palette indices to colors by fancy indexing
+       if BGR2RGB is True (default) the channel order is reversed from RGB to BGR"""
+    if _kaitai and isinstance(color_table, _kaitai["Gif"].ColorTable):
+        color_table = [(e.red, e.green, e.blue) for e in color_table.entries]
+    palette = np.array(color_table, dtype=np.uint8)
+    if BGR2RGB:
+        palette = np.ascontiguousarray(palette[:, ::-1])
+    return palette
+
 def paste(mother, child, x, y):
     "Pastes the numpy image child into the numpy image mother at position (x, y)"
     size = mother.shape
@@ -511,168 +755,1852 @@ def paste(mother, child, x, y):
     mother[sel[0]:sel[2], sel[1]:sel[3]] = childpart
     return mother
 
-def convert(gif_filename, BGR2RGB=True):
-    """converts an image specified by its filename gif_filename to a numpy image
-       if BGR2RGB is True (default) there will also be a color conversion from BGR to RGB"""
-    if not os.path.isfile(gif_filename):
-        raise IOError("File does not exist")
-    frames = []
-    frames_specs = []
-    image_specs = {}
-    gifread = open(gif_filename, "rb")
-    raw = gifread.read()
-    gifread.close()
-    # print(len(raw))
-    image_specs["Length"] = len(raw)
-    data = Gif(KaitaiStream(BytesIO(raw)))
-    # print("Header", data.hdr.magic, data.hdr.version)
-    image_specs["Header"] = str(data.hdr.magic).replace("b'", "").strip("'") + " " + str(data.hdr.version)
-    lsd = data.logical_screen_descriptor
-    image_width = lsd.screen_width
-    image_height = lsd.screen_height
-    # print("Color table size", repr(lsd.color_table_size), "Has color table", lsd.has_color_table, "Image width", image_width, "image height", image_height, "Flags", lsd.flags, "Background color", lsd.bg_color_index, "Pixel aspect ratio", lsd.pixel_aspect_ratio)
-    image_specs["Color table size"] = lsd.color_table_size
-    image_specs["Color table existing"] = lsd.has_color_table
-    image_specs["Image Size"] = image_width, image_height
-    image_specs["Flags"] = lsd.flags
-    image_specs["Background Color"] = lsd.bg_color_index
-    image_specs["Pixel Aspect Ratio"] = lsd.pixel_aspect_ratio
-    # print("Color table length", len(data.global_color_table.entries))
-    image_specs["Color table length"] = len(data.global_color_table.entries)
-    gcte = data.global_color_table.entries
-    color_table = []
-    for i in range(len(gcte)):
-        color_table.append((gcte[i].red, gcte[i].green, gcte[i].blue))
-    # print("Color table values", color_table)
-    image_specs["Color table values"] = color_table
-    # print(len(data.blocks))
-    image_specs["Data Blocks count"]  = len(data.blocks)
-    frames = []
-    exts = []
-    first_frame = True
-    for i in range(len(data.blocks)):
-        # print("Block_type", data.blocks[i].block_type, "block_count:", i)
-        if data.blocks[i].block_type == Gif.BlockType.local_image_descriptor:
-            imgdata = data.blocks[i].body.image_data
-            left = data.blocks[i].body.left
-            top = data.blocks[i].body.top
-            width = data.blocks[i].body.width
-            height = data.blocks[i].body.height
-            flags = data.blocks[i].body.flags
-            has_color_table = data.blocks[i].body.has_color_table
-            if has_color_table:
-                local_color_table = data.blocks[i].body.local_color_table
-            lzw_min = imgdata.lzw_min_code_size
-            if exts == []:
-                exts.append({})
-            exts[-1]["left"] = left
-            exts[-1]["top"] = top
-            exts[-1]["width"] = width
-            exts[-1]["height"] = height
-            exts[-1]["flags1"] = flags
-            exts[-1]["has_color_table"] = has_color_table
-            if has_color_table:
-                exts[-1]["local_color_table"] = local_color_table
-            exts[-1]["lzw_min"] = lzw_min
-            all_bytes = b""
-            alle = 0
-            for j in range(len(imgdata.subblocks.entries)):
-                # print(imgdata.subblocks.entries[i].num_bytes, sep=" ", end=", ")
-                block_len = imgdata.subblocks.entries[j].num_bytes
-                alle = alle + block_len
-                # print(len(imgdata.subblocks.entries[i].bytes), repr(imgdata.subblocks.entries[i].bytes))
-                all_bytes = all_bytes + imgdata.subblocks.entries[j].bytes
-            # print("alle", alle)
-            # print(len(all_bytes))
-            # print("single frame attr at block no.:", i, left, top, width, height, flags, has_color_table, lzw_min)
-            # if has_color_table:
-            #     print(local_color_table)
-            uncompressed = lzw_decompress(all_bytes, lzw_min)
-            np_len = len(uncompressed)
-            # print("Uncompressed image: type/length, image_data[:100]", type(uncompressed), np_len, uncompressed[:100])
-            if len(color_table[0])==1:
-                np_image = np.zeros((np_len), dtype=np.uint8)
-                channels = 1
-            elif len(color_table[0])==2:
-                np_image = np.zeros((np_len*2), dtype=np.uint8)
-                channels = 2
-            elif len(color_table[0])==3:
-                np_image = np.zeros((np_len*3), dtype=np.uint8)
-                channels = 3
-            elif len(color_table[0])==4:
-                np_image = np.zeros((np_len*4), dtype=np.uint8)
-                channels = 4
-            if has_color_table:
-                np_image = np.array([local_color_table[byt] for byt in uncompressed])
+#================================================================
+# Block scanning
+#================================================================
+class ImageBlock(object):
+    '''Image descriptor of a frame together with its color table and image data
+
+    color_table is an (N, 3) uint8 array of RGB colors or None if the global color
+    table applies, data holds the joined LZW data sub-blocks or None if they were skipped.
+    indices may hold the already decompressed palette indices of the image.'''
+
+    __slots__ = [
+        "offset",
+        "left",
+        "top",
+        "width",
+        "height",
+        "flags",
+        "color_table",
+        "lzw_min",
+        "data",
+        "indices",
+    ]
+
+    def __init__(self, offset, left, top, width, height, flags, color_table, lzw_min, data, indices=None):
+        self.offset = offset
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.flags = flags
+        self.color_table = color_table
+        self.lzw_min = lzw_min
+        self.data = data
+        self.indices = indices
+
+    @property
+    def has_color_table(self):
+        return (self.flags & 128) != 0
+
+    @property
+    def has_interlace(self):
+        return (self.flags & 64) != 0
+
+def _truncated(buf, end):
+    "raises ValueError if the data needed up to position end goes beyond the end of buf"
+    if end > len(buf):
+        raise ValueError("Truncated gif image")
+
+def _subblocks_end(buf, pos):
+    "returns the position behind the terminator of the data sub-blocks starting at pos"
+    buf_len = len(buf)
+    while pos < buf_len:
+        num_bytes = buf[pos]
+        if not num_bytes:
+            return pos + 1
+        pos += num_bytes + 1
+    raise ValueError("Truncated gif image")
+
+def _subblocks(buf, pos):
+    "returns the list of the data sub-blocks starting at pos, including the empty terminator, and the end position"
+    subblocks = []
+    buf_len = len(buf)
+    while pos < buf_len:
+        num_bytes = buf[pos]
+        subblocks.append(bytes(buf[pos+1:pos+1+num_bytes]))
+        pos += num_bytes + 1
+        if not num_bytes:
+            return subblocks, pos
+    raise ValueError("Truncated gif image")
+
+def _join_subblocks(buf, pos):
+    "returns the payload of the data sub-blocks starting at pos joined into one bytes object and the end position"
+    chunks = []
+    buf_len = len(buf)
+    while pos < buf_len:
+        num_bytes = buf[pos]
+        if not num_bytes:
+            return b"".join(chunks), pos + 1
+        chunks.append(buf[pos+1:pos+1+num_bytes])
+        pos += num_bytes + 1
+    raise ValueError("Truncated gif image")
+
+def _color_table(buf, pos, flags):
+    "returns the color table of the size given by flags at pos as (N, 3) uint8 view on buf"
+    size = 2 << (flags & 7)
+    _truncated(buf, pos + size*3)
+    return np.frombuffer(buf, dtype=np.uint8, count=size*3, offset=pos).reshape(size, 3)
+
+class BlockScanner(object):
+    '''Scans the blocks of a gif image held in a bytes-like object without copying it
+
+    The headers are read on construction into image_specs and color_table, iter_blocks then
+    yields the blocks as tuples (label, offset, value), label being one of "image",
+    "graphic_control", "application", "comment", "extension" or "end_of_file".
+    Color tables are numpy views on the buffer and the LZW data sub-blocks of an image
+    are joined in a single pass into one bytes object. A block cut off by the end of the
+    data raises ValueError("Truncated gif image"), the scan ends without error at the
+    end of the last complete block if the trailer is missing and at bytes which start
+    no block.'''
+
+    __slots__ = [
+        "buf",
+        "image_specs",
+        "color_table",
+        "blocks_offset",
+    ]
+
+    def __init__(self, buf):
+        '''Initialize the scanner with the complete gif image and read its headers'''
+        buf = memoryview(buf)
+        if buf[0:3].tobytes() != b"GIF":
+            raise ValueError("Not a gif image")
+        _truncated(buf, 13)
+        self.buf = buf
+        image_specs = self.image_specs = {"Length": len(buf)}
+        image_specs["Header"] = "GIF " + buf[3:6].tobytes().decode("ASCII")
+        screen_width, screen_height, flags, bg_color_index, pixel_aspect_ratio = struct.unpack_from("<HHBBB", buf, 6)
+        image_specs["Color table size"] = 2 << (flags & 7)
+        image_specs["Color table existing"] = (flags & 128) != 0
+        image_specs["Image Size"] = screen_width, screen_height
+        image_specs["Flags"] = flags
+        image_specs["Background Color"] = bg_color_index
+        image_specs["Pixel Aspect Ratio"] = pixel_aspect_ratio
+        self.color_table = None
+        self.blocks_offset = 13
+        if flags & 128:
+            self.color_table = _color_table(buf, 13, flags)
+            image_specs["Color table length"] = len(self.color_table)
+            self.blocks_offset += self.color_table.nbytes
+
+    def iter_blocks(self, offset=None, image_data=True):
+        '''Yields the blocks from offset on, by default from the first block
+           if image_data is False the image data is skipped and not joined'''
+        buf = self.buf
+        pos = self.blocks_offset if offset is None else offset
+        buf_len = len(buf)
+        while pos < buf_len:
+            block = _scan_block(buf, pos, image_data)
+            if block is None: # no block, the stream is corrupt from here on
+                break
+            label, value, end = block
+            yield label, pos, value
+            if label == "end_of_file":
+                break
+            pos = end
+
+def _scan_block(buf, pos, image_data=True):
+    """reads the block starting at pos of the memoryview buf and returns the tuple (label, value, end)
+       with the position end behind it, or None if there is no block at pos"""
+    block_type = buf[pos]
+    if block_type == 0x2C: # local image descriptor
+        _truncated(buf, pos + 10)
+        left, top, width, height, flags = struct.unpack_from("<HHHHB", buf, pos+1)
+        start = pos
+        pos += 10
+        color_table = None
+        if flags & 128:
+            color_table = _color_table(buf, pos, flags)
+            pos += color_table.nbytes
+        _truncated(buf, pos + 1)
+        lzw_min = buf[pos]
+        if image_data:
+            data, pos = _join_subblocks(buf, pos+1)
+        else:
+            data, pos = None, _subblocks_end(buf, pos+1)
+        return "image", ImageBlock(start, left, top, width, height, flags, color_table, lzw_min, data), pos
+    elif block_type == 0x21: # extension
+        _truncated(buf, pos + 3)
+        label = buf[pos+1]
+        if label == 0xF9: # graphic control
+            _truncated(buf, pos + 8)
+            flags, delay_time, transparent_idx = struct.unpack_from("<BHB", buf, pos+3)
+            ext_dict = {"block_size": buf[pos+2:pos+3].tobytes(), "flags": flags, "delay_time": delay_time,
+                        "transparent_idx": transparent_idx, "terminator": buf[pos+7:pos+8].tobytes()}
+            return "graphic_control", ext_dict, _subblocks_end(buf, pos+2)
+        elif label == 0xFF: # application
+            _truncated(buf, pos + 3 + buf[pos+2])
+            application_id = buf[pos+3:pos+3+buf[pos+2]].tobytes()
+            subblocks, pos = _subblocks(buf, pos+3+buf[pos+2])
+            return "application", (application_id, subblocks), pos
+        elif label == 0xFE: # comment
+            subblocks, pos = _subblocks(buf, pos+2)
+            return "comment", b"".join(subblocks), pos
+        return "extension", None, _subblocks_end(buf, pos+2)
+    elif block_type == 0x3B: # end of file
+        return "end_of_file", None, pos + 1
+    return None
+
+class KaitaiScanner(object):
+    '''Block scanner on the Kaitai Struct classes, reading the gif image from the KaitaiStream io
+    with GifStream and yielding the same blocks as BlockScanner'''
+
+    __slots__ = [
+        "io",
+        "data",
+        "image_specs",
+        "color_table",
+        "blocks_offset",
+    ]
+
+    def __init__(self, io):
+        '''Initialize the scanner with the stream io and read its headers'''
+        self.io = io
+        try:
+            data = self.data = _kaitai_classes()["GifStream"](io)
+        except EOFError:
+            raise ValueError("Truncated gif image")
+        image_specs = self.image_specs = {"Length": io.size()}
+        image_specs["Header"] = str(data.hdr.magic).replace("b'", "").strip("'") + " " + str(data.hdr.version)
+        lsd = data.logical_screen_descriptor
+        image_specs["Color table size"] = lsd.color_table_size
+        image_specs["Color table existing"] = lsd.has_color_table
+        image_specs["Image Size"] = lsd.screen_width, lsd.screen_height
+        image_specs["Flags"] = lsd.flags
+        image_specs["Background Color"] = lsd.bg_color_index
+        image_specs["Pixel Aspect Ratio"] = lsd.pixel_aspect_ratio
+        self.color_table = None
+        if lsd.has_color_table:
+            image_specs["Color table length"] = len(data.global_color_table.entries)
+            self.color_table = _kaitai_color_table(data.global_color_table)
+        self.blocks_offset = io.pos()
+
+    def iter_blocks(self, offset=None, image_data=True):
+        '''Yields the blocks from offset on, by default from the first block'''
+        io = self.io
+        data = self.data
+        Gif = _kaitai_classes()["Gif"]
+        io.seek(self.blocks_offset if offset is None else offset)
+        while True:
+            start = io.pos()
+            try:
+                block = Gif.Block(io, data, data)
+            except EOFError:
+                raise ValueError("Truncated gif image")
+            except Exception:
+                # the fixed bytes of a graphic control extension cut off by the end of the data
+                if io.is_eof():
+                    raise ValueError("Truncated gif image")
+                raise
+            if block.block_type == Gif.BlockType.local_image_descriptor:
+                desc = block.body
+                color_table = None
+                if desc.has_color_table:
+                    color_table = _kaitai_color_table(desc.local_color_table)
+                imgdata = desc.image_data
+                all_bytes = None
+                if image_data:
+                    all_bytes = b"".join([subblock.bytes for subblock in imgdata.subblocks.entries])
+                yield "image", start, ImageBlock(start, desc.left, desc.top, desc.width, desc.height, desc.flags,
+                                                 color_table, imgdata.lzw_min_code_size, all_bytes)
+            elif block.block_type == Gif.BlockType.extension:
+                label = block.body.label
+                body = block.body.body
+                if label == Gif.ExtensionLabel.graphic_control:
+                    yield "graphic_control", start, {"block_size": body.block_size, "flags": body.flags,
+                        "delay_time": body.delay_time, "transparent_idx": body.transparent_idx, "terminator": body.terminator}
+                elif label == Gif.ExtensionLabel.application:
+                    yield "application", start, (body.application_id.bytes, [b.bytes for b in body.subblocks])
+                elif label == Gif.ExtensionLabel.comment:
+                    yield "comment", start, b"".join([b.bytes for b in body.entries])
             else:
-                np_image = np.array([color_table[byt] for byt in uncompressed])
-            # print("image_height, image_width, channels", image_height, image_width, channels)
-            np_image = np.reshape(np_image, (height, width, channels))
-            # print(np_image.shape, np_image[329-height,329-width,0])
-            if BGR2RGB:
-                if channels == 3 or channels == 4:
-                    np_image = cvtColor(np_image)
-                else:
-                    np_image = np_image.astype(np.uint8)    
+                yield "end_of_file", start, None
+            if io.is_eof() or block.block_type == Gif.BlockType.end_of_file:
+                break
+
+def _kaitai_color_table(color_table):
+    "converts a Gif.ColorTable to an (N, 3) uint8 array"
+    return np.array([(e.red, e.green, e.blue) for e in color_table.entries], dtype=np.uint8).reshape(-1, 3)
+
+def _application_specs(image_specs, application_id, subblocks):
+    "stores an application extension in image_specs, including the loop count of a NETSCAPE block"
+    image_specs["application_id"] = application_id
+    for k in range(len(subblocks)):
+        image_specs["application_subblocks"+str(k)] = subblocks[k]
+    if application_id in (b"NETSCAPE2.0", b"ANIMEXTS1.0") and subblocks and len(subblocks[0]) >= 3 \
+            and subblocks[0][0:1] == b"\x01":
+        image_specs["Loop count"] = struct.unpack("<H", subblocks[0][1:3])[0]
+
+def _is_path(gif_source):
+    "tells if gif_source is a file name rather than the data of a gif image"
+    return isinstance(gif_source, (type(""), type(u""))) or hasattr(gif_source, "__fspath__")
+
+def _file_buffer(gifread, use_mmap):
+    "returns the content of the binary file object gifread, memory-mapped if use_mmap and possible"
+    if use_mmap:
+        try:
+            # the map stays valid after the file is closed and is unmapped with its last view
+            return mmap.mmap(gifread.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, EnvironmentError, ValueError):
+            # no real file or an empty one
+            pass
+    return gifread.read()
+
+@contextmanager
+def _open_scanner(gif_source, parser="scanner", use_mmap=False):
+    """opens gif_source, a file name, a bytes-like object or a binary file object, and yields
+       a KaitaiScanner if parser is "kaitai" else a BlockScanner on it"""
+    if parser == "kaitai":
+        KaitaiStream, BytesIO = _kaitai_classes()["KaitaiStream"], _kaitai_classes()["BytesIO"]
+    if _is_path(gif_source):
+        with open(gif_source, "rb") as gifread:
+            if parser == "kaitai":
+                yield KaitaiScanner(KaitaiStream(gifread))
+            else:
+                yield BlockScanner(_file_buffer(gifread, use_mmap))
+    elif hasattr(gif_source, "read"):
+        if parser == "kaitai":
+            yield KaitaiScanner(KaitaiStream(BytesIO(gif_source.read())))
+        else:
+            yield BlockScanner(_file_buffer(gif_source, use_mmap))
+    elif parser == "kaitai":
+        yield KaitaiScanner(KaitaiStream(BytesIO(bytes(gif_source))))
+    else:
+        yield BlockScanner(gif_source)
+
+#================================================================
+# Resource limits
+#================================================================
+class ResourceLimitError(ValueError):
+    '''Raised when a gif image exceeds one of the Limits set for decoding it'''
+
+class Limits(object):
+    '''Resource limits for decoding one gif image, a limit of None is not checked
+
+    pixels limits width * height of the logical screen and of every image, frames the
+    number of images, decoded_bytes the palette indices of all images together with all
+    frames at the scale decoded and seconds the wall time of decoding. All limits but
+    seconds are checked in a scan of the block headers before any image data is
+    decompressed or a canvas is allocated.'''
+
+    __slots__ = [
+        "pixels",
+        "frames",
+        "decoded_bytes",
+        "seconds",
+    ]
+
+    def __init__(self, pixels=None, frames=None, decoded_bytes=None, seconds=None):
+        self.pixels = pixels
+        self.frames = frames
+        self.decoded_bytes = decoded_bytes
+        self.seconds = seconds
+
+    def check(self, name, value):
+        '''Raises ResourceLimitError if value exceeds the limit name'''
+        limit = getattr(self, name)
+        if limit is not None and value > limit:
+            raise ResourceLimitError("%s of %s exceeds the limit of %s" % (name.capitalize().replace("_", " "),
+                                                                          value, limit))
+
+    def deadline(self):
+        '''Returns the time.perf_counter() value by which decoding has to be done or None'''
+        return None if self.seconds is None else time.perf_counter() + self.seconds
+
+def _check_limits(scanner, limits, disposal=False, scale=1):
+    "checks the block headers of scanner against limits, without decompressing any image data"
+    check_image = _limit_checker(scanner.image_specs, limits, disposal, scale)
+    for label, offset, value in scanner.iter_blocks(image_data=False):
+        if label == "image":
+            check_image(value)
+
+def _limit_checker(image_specs, limits, disposal=False, scale=1):
+    """checks the logical screen of image_specs against limits and returns a function which checks
+       the descriptor of each following ImageBlock, counting the frames and the bytes they decode to"""
+    screen_width, screen_height = image_specs["Image Size"]
+    limits.check("pixels", screen_width * screen_height)
+    totals = {"frame_pixels": -(-screen_width // scale) * -(-screen_height // scale) if disposal else None,
+              "frames": 0, "decoded_bytes": 0}
+
+    def check_image(block):
+        limits.check("pixels", block.width * block.height)
+        if totals["frame_pixels"] is None:
+            # without disposal all frames have the size of the first image
+            totals["frame_pixels"] = -(-block.width // scale) * -(-block.height // scale)
+        totals["frames"] += 1
+        limits.check("frames", totals["frames"])
+        totals["decoded_bytes"] += block.width * block.height + 3 * totals["frame_pixels"]
+        limits.check("decoded_bytes", totals["decoded_bytes"])
+    return check_image
+
+def _check_deadline(deadline):
+    "raises ResourceLimitError if the time.perf_counter() value deadline has passed"
+    if deadline is not None and time.perf_counter() > deadline:
+        raise ResourceLimitError("Decoding exceeds the time limit")
+
+#================================================================
+# Frame decoding
+#================================================================
+class IndexedFrame(object):
+    '''Palette indices of one image of a gif file together with its palette
+
+    indices is the (height, width) uint8 array of the image as stored in the file at the
+    position left, top of the logical screen, palette the (N, 3) uint8 array of RGB colors
+    of its local or the global color table and transparent_idx the transparent palette index
+    or None. The image is not composited with the frames before it.'''
+
+    __slots__ = [
+        "indices",
+        "palette",
+        "transparent_idx",
+        "left",
+        "top",
+    ]
+
+    def __init__(self, indices, palette, transparent_idx=None, left=0, top=0):
+        self.indices = indices
+        self.palette = palette
+        self.transparent_idx = transparent_idx
+        self.left = left
+        self.top = top
+
+    @property
+    def shape(self):
+        return self.indices.shape
+
+    def to_rgb(self, BGR2RGB=True):
+        '''Expands the indices to a (height, width, 3) color image, in BGR order if BGR2RGB is True'''
+        return palette_array(self.palette, BGR2RGB)[self.indices]
+
+class _Canvas(object):
+    '''Logical screen of an animation composited after the disposal methods of its images
+
+    The screen starts filled with the background color. Before an image is drawn the image
+    before it is disposed after its disposal method: 0 and 1 leave it in place, 2 restores
+    the background color and 3 the pixels it had covered. Only the rectangle of an image is
+    drawn, disposed and saved, so the work per frame scales with the changed area.'''
+
+    __slots__ = [
+        "pixels",
+        "background",
+        "rect",
+        "disposal",
+        "saved",
+    ]
+
+    def __init__(self, width, height, background):
+        self.pixels = np.empty((height, width, 3), dtype=np.uint8)
+        self.pixels[...] = background
+        self.background = background
+        self.rect = None
+        self.disposal = 0
+        self.saved = None
+
+    def draw(self, indices, palette, left, top, graphic_control=None):
+        '''Disposes the last image and draws the (height, width) palette indices at left, top,
+           graphic_control is the extension dict of the image or None'''
+        pixels = self.pixels
+        if self.disposal == 2:
+            pixels[self.rect] = self.background
+        elif self.disposal == 3:
+            pixels[self.rect] = self.saved
+        # the part of the image outside the logical screen is cut off
+        height = max(min(indices.shape[0], pixels.shape[0] - top), 0)
+        width = max(min(indices.shape[1], pixels.shape[1] - left), 0)
+        indices = indices[:height, :width]
+        self.rect = slice(top, top + height), slice(left, left + width)
+        flags = graphic_control["flags"] if graphic_control else 0
+        self.disposal = (flags >> 2) & 7
+        self.saved = pixels[self.rect].copy() if self.disposal == 3 else None
+        region = pixels[self.rect]
+        if flags & 1:
+            opaque = indices != graphic_control["transparent_idx"]
+            region[opaque] = palette[indices[opaque]]
+        else:
+            region[...] = palette[indices]
+        return pixels
+
+class DecodeStats(object):
+    '''Timings and counters of every frame decoded, recorded when passed as stats to convert
+
+    For every frame a dict is appended to frames with the frame number and the wall times in
+    seconds of the stages: parse for scanning the blocks and joining the data sub-blocks before
+    the frame, lzw for decompressing its data, palette for selecting the color table, whose
+    colors are already in BGR2RGB order, and arranging the indices, and composite for expanding
+    the indices to colors and compositing the frame. bytes_in and bytes_out are the sizes of
+    the LZW data and of the palette indices, codes and clears the number of LZW codes and of the
+    clear codes resetting the code table, which are not counted by the "list" engine. With
+    lzw_workers the LZW data is decompressed in other processes and not timed. callback is
+    called with the dict of each frame as soon as the frame is done.'''
+
+    __slots__ = [
+        "frames",
+        "callback",
+        "parse",
+        "clock",
+    ]
+
+    stages = "parse", "lzw", "palette", "composite"
+
+    def __init__(self, callback=None):
+        self.frames = []
+        self.callback = callback
+        self.parse = 0.0
+        self.clock = None
+
+    def start(self, block, n):
+        '''Starts the record of frame n from an ImageBlock and returns it'''
+        record = {"frame": n, "parse": self.parse, "lzw": 0.0, "palette": 0.0, "composite": 0.0,
+                  "bytes_in": 0 if block.data is None else len(block.data), "bytes_out": 0, "codes": 0, "clears": 0}
+        self.frames.append(record)
+        self.parse = 0.0
+        self.clock = time.perf_counter()
+        return record
+
+    def lap(self, stage, done=False):
+        '''Adds the time since the last lap to stage of the current frame, done ends the frame'''
+        clock = time.perf_counter()
+        record = self.frames[-1]
+        record[stage] += clock - self.clock
+        self.clock = clock
+        if done and self.callback is not None:
+            self.callback(record)
+
+    def iter_blocks(self, blocks):
+        '''Yields the blocks of the iterable blocks and adds the time taken to produce them to parse'''
+        blocks = iter(blocks)
+        while True:
+            start = time.perf_counter()
+            try:
+                block = next(blocks)
+            except StopIteration:
+                return
+            self.parse += time.perf_counter() - start
+            yield block
+
+    def totals(self):
+        '''Returns the sums of the times and counters of all frames as dict'''
+        totals = dict.fromkeys(self.stages + ("bytes_in", "bytes_out", "codes", "clears"), 0)
+        for record in self.frames:
+            for name in totals:
+                totals[name] += record[name]
+        totals["frames"] = len(self.frames)
+        return totals
+
+def _reduction(screen_size, scale=1, max_size=None):
+    "returns the integer factor by which the logical screen of screen_size is reduced for scale and max_size"
+    scale = int(scale)
+    if scale < 1:
+        raise ValueError("Scale must be a positive integer")
+    if max_size is not None:
+        if max_size < 1:
+            raise ValueError("Maximum size must be positive")
+        scale = max(scale, -(-max(screen_size) // int(max_size)))
+    return scale
+
+class _FrameDecoder(object):
+    '''Decodes the blocks of a gif stream one by one into frames
+
+    Only the canvas state needed for the next frame is kept: the first frame, on which
+    new images are pasted, and the last frame, from which transparent pixels are taken.
+    If keep_exts is False only the extension dict of the current frame is kept.
+    If indexed is True the images are returned as IndexedFrame without compositing.
+    If out is set to an array of shape (frames, height, width, 3), each frame is composited
+    directly into its slice of out. If disposal is True the frames are composited on a
+    _Canvas of the size of the logical screen after the disposal methods instead.
+    With scale n > 1 only every n-th row and column of the logical screen is decoded to colors,
+    the palette indices of each image are subsampled before they are expanded and composited.
+    max_size sets the smallest scale reducing the logical screen to at most max_size pixels.
+    If selected maps frame numbers to their position in out, only these frames are stacked.'''
+
+    __slots__ = [
+        "BGR2RGB",
+        "lzw_engine",
+        "keep_exts",
+        "indexed",
+        "image_specs",
+        "exts",
+        "global_color_table",
+        "global_palette",
+        "frame1",
+        "last_frame",
+        "out",
+        "canvas",
+        "graphic_control",
+        "scale",
+        "stats",
+        "selected",
+    ]
+
+    def __init__(self, scanner, image_specs, BGR2RGB=True, lzw_engine="table", keep_exts=True, indexed=False,
+                 disposal=False, scale=1, max_size=None):
+        '''Initialize the decoder from the headers read by scanner and fill image_specs'''
+        self.BGR2RGB = BGR2RGB
+        self.lzw_engine = lzw_engine
+        self.keep_exts = keep_exts
+        self.indexed = indexed
+        self.image_specs = image_specs
+        self.exts = []
+        self.frame1 = None
+        self.last_frame = None
+        self.out = None
+        self.canvas = None
+        self.graphic_control = None
+        self.global_color_table = None
+        self.global_palette = None
+        image_specs.update(scanner.image_specs)
+        if scanner.color_table is not None:
+            image_specs["Color table values"] = list(map(tuple, scanner.color_table.tolist()))
+            # a copy, as the color table of the scanner is a view on the file data
+            self.global_color_table = np.array(scanner.color_table)
+            self.global_palette = palette_array(scanner.color_table, BGR2RGB)
+        self.scale = _reduction(image_specs["Image Size"], scale, max_size)
+        self.stats = None
+        self.selected = None
+        if disposal:
+            background = 0
+            if self.global_palette is not None and image_specs["Background Color"] < len(self.global_palette):
+                background = self.global_palette[image_specs["Background Color"]]
+            screen_width, screen_height = image_specs["Image Size"]
+            self.canvas = _Canvas(-(-screen_width // self.scale), -(-screen_height // self.scale), background)
+        image_specs["Data Blocks count"] = 0
+        image_specs["Frame count"] = 0
+
+    def block(self, label, offset, value):
+        '''Process the next block, returns the frame if the block was an image otherwise None'''
+        self.image_specs["Data Blocks count"] += 1
+        if label == "image":
+            return self.image(value)
+        elif label == "graphic_control":
+            if not self.keep_exts:
+                del self.exts[:]
+            self.exts.append(value)
+            self.graphic_control = value
+        elif label == "application":
+            _application_specs(self.image_specs, *value)
+        elif label == "comment":
+            self.image_specs["comment"] = value
+        return None
+
+    def image(self, block):
+        '''Decode an ImageBlock and composite it to the next frame,
+           only the exts are updated if the image data was skipped'''
+        exts = self.exts
+        width = block.width
+        height = block.height
+        if exts == []:
+            exts.append({})
+        exts[-1]["left"] = block.left
+        exts[-1]["top"] = block.top
+        exts[-1]["width"] = width
+        exts[-1]["height"] = height
+        exts[-1]["flags1"] = block.flags
+        exts[-1]["has_color_table"] = block.has_color_table
+        if block.has_color_table:
+            exts[-1]["local_color_table"] = list(map(tuple, block.color_table.tolist()))
+        exts[-1]["lzw_min"] = block.lzw_min
+        self.image_specs["Frame count"] += 1
+        # a graphic control extension applies to the next image only
+        graphic_control = self.graphic_control
+        self.graphic_control = None
+        if block.indices is None and block.data is None:
+            return None
+        stats = self.stats
+        if stats is not None:
+            record = stats.start(block, self.image_specs["Frame count"] - 1)
+        if block.indices is not None:
+            uncompressed = block.indices
+        else:
+            uncompressed = _decompress(block.data, block.lzw_min, width*height, self.lzw_engine,
+                                       None if stats is None else record)
+        if stats is not None:
+            record["bytes_out"] = len(uncompressed)
+            stats.lap("lzw")
+        indices = np.reshape(uncompressed, (height, width))
+        if block.has_interlace:
+            indices = indices[deinterlace_rows(height)]
+        left, top = block.left, block.top
+        if self.scale > 1:
+            # without disposal the first image is the canvas wherever it is placed
+            first = self.canvas is None and self.frame1 is None and not self.indexed
+            indices, left, top = self._reduce(indices, 0 if first else left, 0 if first else top)
+        if self.indexed:
+            color_table = np.array(block.color_table) if block.has_color_table else self.global_color_table
+            if color_table is None:
+                raise ValueError("Image without color table")
+            # only the extension of the image itself makes it transparent, not one carried over in exts
+            transparent_idx = None
+            if graphic_control and graphic_control["flags"] & 1:
+                transparent_idx = graphic_control["transparent_idx"]
+            if stats is not None:
+                stats.lap("palette", True)
+            return IndexedFrame(indices, color_table, transparent_idx, left, top)
+        palette = self._palette(block)
+        if stats is not None:
+            stats.lap("palette")
+        if self.canvas is not None:
+            pixels = self.canvas.draw(indices, palette, left, top, graphic_control)
+            np_image = self._frame(pixels.shape)
+            np_image[...] = pixels
+            if stats is not None:
+                stats.lap("composite", True)
+            return np_image
+        if self.frame1 is None:
+            np_image = self._frame(indices.shape + palette.shape[1:])
+            np.take(palette, indices, axis=0, out=np_image)
+            self.frame1 = np_image.copy()
+        else:
+            frame1 = self.frame1
+            np_image = self._frame(frame1.shape)
+            np_image[...] = frame1
+            paste(np_image, palette[indices], left, top)
+            # after a graphic control extension the pixels showing its transparent color are taken
+            # from the old frame, as in version 1.3 also if its transparent color flag is not set
+            if "transparent_idx" in exts[-1]:
+                transp_color = palette[exts[-1]['transparent_idx']]
+                # pixels of the first frame showing the transparent color are taken from the old frame,
+                # inside the new image the palette indices with the transparent color are masked
+                transp_mask = np.all(frame1 == transp_color, axis=-1)
+                transp_mask = paste(transp_mask, np.all(palette == transp_color, axis=-1)[indices], left, top)
+                np.copyto(np_image, self.last_frame, where=transp_mask[:, :, np.newaxis])
+        self.last_frame = np_image
+        if stats is not None:
+            stats.lap("composite", True)
+        return np_image
+
+    def passes(self, block):
+        '''Yields the first three passes of an interlaced ImageBlock as color images of its own
+           size while its LZW data is decoded, the rows not decoded yet repeat the row above
+           The complete indices are set in block afterwards, so that image composites it.'''
+        if not block.has_interlace or block.data is None or block.indices is not None:
+            return
+        palette = self._palette(block)
+        height, width = block.height, block.width
+        rows = interlace_passes(height)[:3]
+        decoded = lzw_decode_iter(block.data, block.lzw_min, width*height, [width*row for row in rows])
+        for row, indices in zip(rows, decoded):
+            if row < height:
+                indices = np.reshape(indices, (height, width))[deinterlace_rows(height, row)]
+                yield palette[indices[::self.scale, ::self.scale]]
+        block.indices = next(decoded)
+
+    def _reduce(self, indices, left, top):
+        '''Subsamples the indices of an image at left, top to the rows and columns of the logical
+           screen kept at the scale of the decoder, returns them with their reduced position'''
+        scale = self.scale
+        row = -top % scale
+        col = -left % scale
+        return indices[row::scale, col::scale], (left + col) // scale, (top + row) // scale
+
+    def _palette(self, block):
+        '''Returns the palette array of the local or global color table of an ImageBlock'''
+        if block.has_color_table:
+            return palette_array(block.color_table, self.BGR2RGB)
+        elif self.global_palette is not None:
+            return self.global_palette
+        raise ValueError("Image without color table")
+
+    def _frame(self, shape):
+        '''Returns the array the next frame is written to, its slice of out if frames are stacked'''
+        n = self.image_specs["Frame count"] - 1
+        if self.selected is not None:
+            n = self.selected.get(n)
+        if self.out is None or n is None:
+            return np.empty(shape, dtype=np.uint8)
+        frame = self.out[n]
+        if frame.shape != shape:
+            raise ValueError("Frame of shape %s does not fit into stacked frames of shape %s" % (shape, frame.shape))
+        return frame
+
+def _decompress(data, lzw_min, size, lzw_engine, counts=None):
+    "decompresses the LZW data of an image with lzw_engine into a uint8 index array"
+    if lzw_engine == "table":
+        return lzw_decode(data, lzw_min, size, counts)
+    return np.array(lzw_decompress(data, lzw_min, size), dtype=np.uint8)
+
+def _decompress_ahead(blocks, executor, window, lzw_engine):
+    """yields the blocks unchanged, except that the LZW data of up to window images is decompressed
+       ahead in executor and the indices of each image are set when it is yielded,
+       images whose data was skipped are passed on as they are"""
+    pending = deque()
+    images = 0
+    for label, offset, value in blocks:
+        if label == "image" and value.data is not None:
+            value.indices = executor.submit(_decompress, value.data, value.lzw_min, value.width*value.height, lzw_engine)
+            images += 1
+        pending.append((label, offset, value))
+        while pending and (pending[0][0] != "image" or pending[0][2].data is None or images > window):
+            label, offset, value = pending.popleft()
+            if label == "image" and value.data is not None:
+                value.indices = value.indices.result()
+                images -= 1
+            yield label, offset, value
+    for label, offset, value in pending:
+        if label == "image" and value.data is not None:
+            value.indices = value.indices.result()
+        yield label, offset, value
+
+def _frames_layout(scanner, disposal=False, scale=1):
+    """returns the number of frames and the shape of the first image, or of the logical screen with
+       disposal, reduced by scale from a scan of the image descriptors"""
+    frame_count = 0
+    screen_width, screen_height = scanner.image_specs["Image Size"]
+    shape = screen_height, screen_width
+    for label, offset, value in scanner.iter_blocks(image_data=False):
+        if label == "image":
+            if not frame_count and not disposal:
+                # all frames are composited on the first one
+                shape = value.height, value.width
+            frame_count += 1
+    return frame_count, (-(-shape[0] // scale), -(-shape[1] // scale))
+
+def _stack_array(scanner, stack, disposal=False, scale=1, frame_count=None):
+    """allocates the array for all frames of scanner, or for frame_count frames, memory-mapped
+       to the .npy file stack if it is a file name"""
+    count, shape = _frames_layout(scanner, disposal, scale)
+    if frame_count is None:
+        frame_count = count
+    shape = (frame_count,) + shape + (3,)
+    if _is_path(stack):
+        return np.lib.format.open_memmap(stack, mode="w+", dtype=np.uint8, shape=shape)
+    return np.empty(shape, dtype=np.uint8)
+
+def _frame_selection(index, frames=None, max_frames=None, step=1, indexed=False, disposal=False):
+    """returns the ascending list of the frame numbers selected by frames, step and max_frames and
+       the set of the frame numbers which have to be decoded to composite them, found with the FrameIndex index"""
+    if frames is None:
+        frames = range(len(index))
+    elif isinstance(frames, slice):
+        frames = range(len(index))[frames]
+    selected = sorted(set(n for n in frames if 0 <= n < len(index)))[::step]
+    if max_frames is not None:
+        selected = selected[:max_frames]
+    required = set()
+    for n in selected:
+        keyframe = n if indexed else index.keyframe(n, disposal)
+        required.update(range(keyframe, n+1))
+        if keyframe > 0 and not indexed and not disposal:
+            # the first frame is the canvas all later frames are pasted on
+            required.add(0)
+    return selected, required
+
+def _skip_images(blocks, required):
+    "yields the blocks, but drops the image data of the images whose number is not in required"
+    n = 0
+    for label, offset, value in blocks:
+        if label == "image":
+            if n not in required:
+                value.data = None
+            n += 1
+        yield label, offset, value
+
+def _iter_frames(gif_filename, image_specs, exts, BGR2RGB=True, lzw_engine="table", parser="scanner", use_mmap=False,
+                 lzw_workers=None, indexed=False, stack=False, stacked=None, disposal=False, scale=1, max_size=None,
+                 stats=None, frames=None, max_frames=None, step=1, limits=None):
+    """yields (frame, ext) of the gif file while decoding its blocks one at a time
+       if stack is set the frames are slices of one array, which is appended to the list stacked
+       if frames, max_frames or step select frames, only the frames needed for them are decoded
+       and decoding stops after the last selected frame
+       limits are checked in a scan of the block headers and the time limit after every block"""
+    selection = frames is not None or max_frames is not None or step != 1
+    deadline = None if limits is None else limits.deadline()
+    executor = lzw_workers
+    if isinstance(lzw_workers, int):
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(lzw_workers)
+    try:
+        with _open_scanner(gif_filename, parser, use_mmap) as scanner:
+            if limits is not None:
+                _check_limits(scanner, limits, disposal, _reduction(scanner.image_specs["Image Size"], scale, max_size))
+            decoder = _FrameDecoder(scanner, image_specs, BGR2RGB, lzw_engine, exts is not None, indexed, disposal,
+                                    scale, max_size)
+            if exts is not None:
+                decoder.exts = exts
+            if selection:
+                selected, required = _frame_selection(_index_scanner(scanner), frames, max_frames, step,
+                                                      indexed, disposal)
+                decoder.selected = dict((n, i) for i, n in enumerate(selected))
+            if stack is not False and stack is not None:
+                decoder.out = _stack_array(scanner, stack, disposal, decoder.scale,
+                                           len(selected) if selection else None)
+                stacked.append(decoder.out)
+            blocks = scanner.iter_blocks()
+            if stats is not None:
+                decoder.stats = stats
+                blocks = stats.iter_blocks(blocks)
+            if selection:
+                if not selected:
+                    return
+                blocks = _skip_images(blocks, required)
+            if executor is not None:
+                window = 4 * (getattr(executor, "_max_workers", None) or os.cpu_count() or 1)
+                blocks = _decompress_ahead(blocks, executor, window, lzw_engine)
+            for label, offset, value in blocks:
+                frame = decoder.block(label, offset, value)
+                _check_deadline(deadline)
+                if frame is None:
+                    continue
+                if selection:
+                    n = image_specs["Frame count"] - 1
+                    if n not in decoder.selected:
+                        continue
+                yield frame, decoder.exts[-1]
+                if selection and n == selected[-1]:
+                    break
+    finally:
+        if executor is not lzw_workers:
+            executor.shutdown()
+
+def _check_args(gif_filename, lzw_engine="table", parser="scanner", indexed=False, stack=False, max_frames=None,
+                step=1):
+    "raises the errors of convert for invalid arguments before anything is read"
+    if _is_path(gif_filename):
+        if not os.path.isfile(gif_filename):
+            raise IOError("File does not exist")
+    elif not hasattr(gif_filename, "read"):
+        # raises TypeError for objects without buffer interface
+        memoryview(gif_filename)
+    if lzw_engine not in ("table", "list"):
+        raise ValueError("Unknown LZW engine %r" % (lzw_engine,))
+    if parser not in ("scanner", "kaitai"):
+        raise ValueError("Unknown parser %r" % (parser,))
+    if indexed and stack is not False and stack is not None:
+        raise ValueError("Indexed frames cannot be stacked")
+    if max_frames is not None and max_frames < 0:
+        raise ValueError("Maximum number of frames must not be negative")
+    if step < 1:
+        raise ValueError("Step must be a positive integer")
+
+def iter_frames(gif_filename, BGR2RGB=True, lzw_engine="table", image_specs=None, parser="scanner", use_mmap=False,
+                lzw_workers=None, indexed=False, disposal=False, scale=1, max_size=None, stats=None, frames=None,
+                max_frames=None, step=1, limits=None):
+    """iterates over the frames of the gif image gif_filename and yields tuples (frame, ext)
+       with the numpy image and the extension dict of each frame, see convert for the arguments
+       The blocks are decoded one at a time, so memory stays bounded by the canvas size
+       independently of the frame count. If a dict image_specs is given it is filled with the
+       image specs while iterating."""
+    _check_args(gif_filename, lzw_engine, parser, max_frames=max_frames, step=step)
+    if image_specs is None:
+        image_specs = {}
+    return _iter_frames(gif_filename, image_specs, None, BGR2RGB=BGR2RGB, lzw_engine=lzw_engine, parser=parser,
+                        use_mmap=use_mmap, lzw_workers=lzw_workers, indexed=indexed, disposal=disposal,
+                        scale=scale, max_size=max_size, stats=stats, frames=frames, max_frames=max_frames, step=step,
+                        limits=limits)
+
+def iter_progressive(gif_filename, BGR2RGB=True, parser="scanner", use_mmap=False, disposal=False, scale=1,
+                     max_size=None):
+    """iterates over the frames of the gif image gif_filename as iter_frames and yields tuples
+       (frame, ext, complete). Before an interlaced frame its first three passes, every 8th,
+       every 4th and every 2nd row, are yielded with complete False as soon as they are decoded,
+       as previews of the size of the image itself with each missing row filled from the row
+       above. These previews are not composited with the frames before."""
+    _check_args(gif_filename, parser=parser)
+    with _open_scanner(gif_filename, parser, use_mmap) as scanner:
+        decoder = _FrameDecoder(scanner, {}, BGR2RGB, "table", False, False, disposal, scale, max_size)
+        for label, offset, value in scanner.iter_blocks():
+            if label == "image":
+                for preview in decoder.passes(value):
+                    yield preview, decoder.exts[-1] if decoder.exts else {}, False
+            frame = decoder.block(label, offset, value)
+            if frame is not None:
+                yield frame, decoder.exts[-1], True
+
+#================================================================
+# Incremental decoding
+#================================================================
+def _subblocks_scan(buf, pos):
+    """returns the position behind the terminator of the data sub-blocks starting at pos and the
+       position of the terminator, or -1 and the position reached if buf ends before it"""
+    buf_len = len(buf)
+    while pos < buf_len:
+        num_bytes = buf[pos]
+        if not num_bytes:
+            return pos + 1, pos
+        pos += num_bytes + 1
+    return -1, pos
+
+class StreamDecoder(object):
+    '''Push decoder of a gif image arriving in chunks of any size, e.g. from a network stream
+
+    feed(data) appends the next chunk and returns the list of (frame, ext) of the images
+    completed by it, each image is decoded as soon as its terminating empty sub-block arrives.
+    The parser state is kept between chunks: only the data not parsed yet is buffered, and of
+    an image its descriptor and the LZW data sub-blocks received so far, so that no byte is
+    scanned twice. image_specs is filled as the blocks arrive, close() ends the stream.
+    The arguments are those of iter_frames, limits are checked on every block header.'''
+
+    __slots__ = [
+        "buf",
+        "pos",
+        "scan",
+        "offset",
+        "image",
+        "chunks",
+        "decoder",
+        "image_specs",
+        "done",
+        "options",
+        "limits",
+        "check_image",
+        "deadline",
+    ]
+
+    def __init__(self, BGR2RGB=True, lzw_engine="table", indexed=False, disposal=False, scale=1, max_size=None,
+                 limits=None):
+        if lzw_engine not in ("table", "list"):
+            raise ValueError("Unknown LZW engine %r" % (lzw_engine,))
+        self.buf = bytearray()
+        self.pos = 0
+        self.scan = None
+        self.offset = 0
+        self.image = None
+        self.chunks = None
+        self.decoder = None
+        self.image_specs = {}
+        self.done = False
+        self.options = (BGR2RGB, lzw_engine, False, indexed, disposal, scale, max_size)
+        self.limits = limits
+        self.check_image = None
+        self.deadline = None if limits is None else limits.deadline()
+
+    def feed(self, data):
+        '''Appends the bytes-like data to the stream and returns the list of (frame, ext)
+           of the images completed by it, data after the trailer is ignored'''
+        frames = []
+        if self.done:
+            return frames
+        buf = self.buf
+        buf += data
+        while not self.done:
+            if self.decoder is None:
+                if not self._header():
+                    break
+            elif self.image is not None:
+                if not self._image_data(frames):
+                    break
+            elif self.pos >= len(buf) or not self._block():
+                break
+            _check_deadline(self.deadline)
+        # only the unparsed rest stays buffered
+        del buf[:self.pos]
+        if self.scan is not None:
+            self.scan -= self.pos
+        self.offset += self.pos
+        self.pos = 0
+        self.image_specs["Length"] = self.offset + len(buf)
+        return frames
+
+    def close(self):
+        '''Ends the stream and returns the list of (frame, ext) of an image whose data was cut
+           off, decoded from the data received with the missing pixels set to index 0, where
+           convert raises ValueError("Truncated gif image") for the same data'''
+        frames = []
+        if self.decoder is None:
+            raise ValueError("Not a gif image")
+        if self.image is not None:
+            self._image_done(frames)
+        self.done = True
+        return frames
+
+    def _header(self):
+        '''Reads the header and the global color table once they are complete'''
+        buf = self.buf
+        if len(buf) < 13:
+            if buf[0:3] != b"GIF"[:len(buf)]:
+                raise ValueError("Not a gif image")
+            return False
+        header_size = 13 + (3 * (2 << (buf[10] & 7)) if buf[10] & 128 else 0)
+        if len(buf) < header_size:
+            return False
+        scanner = BlockScanner(bytes(buf[:header_size]))
+        decoder = self.decoder = _FrameDecoder(scanner, self.image_specs, *self.options)
+        if self.limits is not None:
+            self.check_image = _limit_checker(self.image_specs, self.limits, self.options[4], decoder.scale)
+        self.pos = header_size
+        return True
+
+    def _block(self):
+        '''Reads the block at pos if it is complete, of an image only its descriptor'''
+        buf = self.buf
+        pos = self.pos
+        block_type = buf[pos]
+        if block_type == 0x2C: # local image descriptor
+            if len(buf) < pos + 10:
+                return False
+            flags = buf[pos+9]
+            table_size = 3 * (2 << (flags & 7)) if flags & 128 else 0
+            if len(buf) < pos + 11 + table_size:
+                return False
+            left, top, width, height = struct.unpack_from("<HHHH", buf, pos+1)
+            color_table = None
+            if flags & 128:
+                color_table = _color_table(bytes(buf[pos+10:pos+10+table_size]), 0, flags)
+            image = ImageBlock(self.offset + pos, left, top, width, height, flags, color_table,
+                               buf[pos+10+table_size], None)
+            if self.check_image is not None:
+                self.check_image(image)
+            self.image = image
+            self.chunks = []
+            self.pos = pos + 11 + table_size
+            return True
+        if block_type == 0x21: # extension, its sub-blocks start behind the label
+            end, self.scan = _subblocks_scan(buf, pos + 2 if self.scan is None else self.scan)
+            if end < 0:
+                return False
+            self.scan = None
+        elif block_type == 0x3B: # end of file
+            end = pos + 1
+        else: # no block, the stream is corrupt from here on
+            self.done = True
+            return False
+        label, value, size = _scan_block(memoryview(bytes(buf[pos:end])), 0)
+        self.decoder.block(label, self.offset + pos, value)
+        self.done = label == "end_of_file"
+        self.pos = pos + size
+        return True
+
+    def _image_data(self, frames):
+        '''Collects the LZW data sub-blocks of the current image, decodes it once they are complete'''
+        buf = self.buf
+        pos = self.pos
+        buf_len = len(buf)
+        chunks = self.chunks
+        while pos < buf_len:
+            num_bytes = buf[pos]
+            if not num_bytes:
+                self.pos = pos + 1
+                self._image_done(frames)
+                return True
+            if pos + 1 + num_bytes > buf_len:
+                break
+            chunks.append(bytes(buf[pos+1:pos+1+num_bytes]))
+            pos += num_bytes + 1
+        self.pos = pos
+        return False
+
+    def _image_done(self, frames):
+        '''Decodes the current image from the data sub-blocks collected'''
+        image = self.image
+        image.data = b"".join(self.chunks)
+        self.image = None
+        self.chunks = None
+        frame = self.decoder.block("image", image.offset, image)
+        if frame is not None:
+            frames.append((frame, self.decoder.exts[-1]))
+
+async def decode_stream(chunks, executor=None, **decoder_kwargs):
+    """yields asynchronously the tuples (frame, ext) of the gif image read from
+       the asynchronous iterator chunks of bytes, e.g. the body of an upload, so that the first
+       frames are available before the last bytes have arrived:
+
+           async for frame, ext in gif2numpy.decode_stream(request.content.iter_chunked(1 << 16)):
+               ...
+
+       The chunks are decoded by a StreamDecoder created with decoder_kwargs, in executor or
+       in the default executor of the event loop if None, while the event loop goes on with I/O."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    decoder = StreamDecoder(**decoder_kwargs)
+    async for chunk in chunks:
+        for frame_ext in await loop.run_in_executor(executor, decoder.feed, chunk):
+            yield frame_ext
+    for frame_ext in await loop.run_in_executor(executor, decoder.close):
+        yield frame_ext
+
+#================================================================
+# Metadata without decoding
+#================================================================
+def probe(gif_filename, use_mmap=False):
+    """reads the metadata of the gif image gif_filename without decoding it and returns (exts, image_specs)
+       with the same content as convert, the image data sub-blocks are skipped by their length bytes"""
+    _check_args(gif_filename)
+    with _open_scanner(gif_filename, use_mmap=use_mmap) as scanner:
+        decoder = _FrameDecoder(scanner, {})
+        for label, offset, value in scanner.iter_blocks(image_data=False):
+            decoder.block(label, offset, value)
+    return decoder.exts, decoder.image_specs
+
+FRAME_DTYPE = np.dtype([
+    ("left", "<u2"),
+    ("top", "<u2"),
+    ("width", "<u2"),
+    ("height", "<u2"),
+    ("delay", "<u2"),
+    ("disposal", "u1"),
+    ("transparent", "?"),
+    ("transparent_idx", "u1"),
+    ("local_palette", "?"),
+    ("lzw_min", "u1"),
+    ("has_gce", "?"),
+    ("gce_flags", "u1"),
+    ("image_flags", "u1"),
+])
+
+class GifMetadata(object):
+    '''Metadata of a gif image with the file-level fields as attributes and the per-frame fields
+    as numpy structured array frames of dtype FRAME_DTYPE, one row of 18 bytes per frame
+
+    delay is in 1/100 s, transparent tells if transparent_idx is the transparent color of a frame
+    and local_palette if a frame has a local color table, these are kept in local_color_tables
+    by frame number. gce_flags and image_flags are the packed flag bytes of the graphic control
+    extension, if has_gce, and of the image descriptor. Color tables are (N, 3) uint8 RGB arrays.
+    to_exts and to_image_specs convert to the dicts of probe and convert.'''
+
+    __slots__ = [
+        "length",
+        "version",
+        "screen_size",
+        "flags",
+        "background",
+        "aspect_ratio",
+        "color_table",
+        "loop_count",
+        "applications",
+        "comment",
+        "blocks",
+        "local_color_tables",
+        "frames",
+    ]
+
+    def __init__(self, scanner):
+        '''Initialize the file-level fields from the headers read by scanner, without frames'''
+        image_specs = scanner.image_specs
+        self.length = image_specs["Length"]
+        self.version = image_specs["Header"][4:]
+        self.screen_size = image_specs["Image Size"]
+        self.flags = image_specs["Flags"]
+        self.background = image_specs["Background Color"]
+        self.aspect_ratio = image_specs["Pixel Aspect Ratio"]
+        self.color_table = None if scanner.color_table is None else np.array(scanner.color_table)
+        self.loop_count = None
+        self.applications = []
+        self.comment = None
+        self.blocks = 0
+        self.local_color_tables = {}
+        self.frames = np.zeros(0, dtype=FRAME_DTYPE)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def to_image_specs(self):
+        '''Returns the image_specs dict of convert'''
+        image_specs = {"Length": self.length, "Header": "GIF " + self.version,
+                       "Color table size": 2 << (self.flags & 7), "Color table existing": (self.flags & 128) != 0,
+                       "Image Size": self.screen_size, "Flags": self.flags, "Background Color": self.background,
+                       "Pixel Aspect Ratio": self.aspect_ratio}
+        if self.color_table is not None:
+            image_specs["Color table length"] = len(self.color_table)
+            image_specs["Color table values"] = list(map(tuple, self.color_table.tolist()))
+        image_specs["Data Blocks count"] = self.blocks
+        image_specs["Frame count"] = len(self.frames)
+        for application_id, subblocks in self.applications:
+            _application_specs(image_specs, application_id, subblocks)
+        if self.comment is not None:
+            image_specs["comment"] = self.comment
+        return image_specs
+
+    def to_exts(self):
+        '''Returns the list of extension dicts of convert, like convert a frame without graphic
+           control extension updates the dict of the frame before, block_size and terminator
+           are those of a well-formed graphic control extension'''
+        exts = []
+        for n, (left, top, width, height, delay, disposal, transparent, transparent_idx, local_palette, lzw_min,
+                has_gce, gce_flags, image_flags) in enumerate(self.frames.tolist()):
+            if has_gce:
+                ext = {"block_size": b"\x04", "flags": gce_flags, "delay_time": delay,
+                       "transparent_idx": transparent_idx, "terminator": b"\x00"}
+                exts.append(ext)
+            elif exts:
+                ext = exts[-1]
             else:
-                np_image = np_image.astype(np.uint8)
-            if first_frame:
-                first_frame = False
-                frame1 = np_image.copy()
+                ext = {}
+                exts.append(ext)
+            ext["left"] = left
+            ext["top"] = top
+            ext["width"] = width
+            ext["height"] = height
+            ext["flags1"] = image_flags
+            ext["has_color_table"] = local_palette
+            if local_palette:
+                ext["local_color_table"] = list(map(tuple, self.local_color_tables[n].tolist()))
+            ext["lzw_min"] = lzw_min
+        return exts
+
+def metadata(gif_filename, use_mmap=False):
+    """reads the metadata of the gif image gif_filename without decoding it and returns it as GifMetadata
+       with a numpy structured array of the per-frame fields, as probe but without a dict per frame"""
+    _check_args(gif_filename)
+    with _open_scanner(gif_filename, use_mmap=use_mmap) as scanner:
+        meta = GifMetadata(scanner)
+        rows = []
+        gce = None
+        for label, offset, value in scanner.iter_blocks(image_data=False):
+            meta.blocks += 1
+            if label == "image":
+                flags = 0 if gce is None else gce["flags"]
+                if value.has_color_table:
+                    meta.local_color_tables[len(rows)] = np.array(value.color_table)
+                rows.append((value.left, value.top, value.width, value.height, 0 if gce is None else gce["delay_time"],
+                             (flags >> 2) & 7, flags & 1, 0 if gce is None else gce["transparent_idx"],
+                             value.has_color_table, value.lzw_min, gce is not None, flags, value.flags))
+                # a graphic control extension applies to the next image only
+                gce = None
+            elif label == "graphic_control":
+                gce = value
+            elif label == "application":
+                meta.applications.append(value)
+                image_specs = {}
+                _application_specs(image_specs, *value)
+                meta.loop_count = image_specs.get("Loop count", meta.loop_count)
+            elif label == "comment":
+                meta.comment = value
+    meta.frames = np.array(rows, dtype=FRAME_DTYPE)
+    return meta
+
+#================================================================
+# Random access to frames
+#================================================================
+class FrameIndex(object):
+    '''Byte offsets and dependencies of the frames of a gif image
+
+    For every frame the offsets of its image descriptor and of its own graphic control
+    extension (-1 if none) are recorded together with the disposal method and the transparent
+    color flag of that extension (0 if none). A frame is a keyframe if it does not need the
+    frame before it: the first frame and every frame before the first graphic control
+    extension, which is pasted on the first frame only. Frames covering the whole logical
+    screen are marked as full canvas. When composited after the disposal methods a frame needs
+    no frame before it if it covers the whole screen without transparent color of its own and
+    does not restore the screen from before it afterwards, which needs the frames before it.'''
+
+    __slots__ = [
+        "length",
+        "screen_size",
+        "offsets",
+        "gce_offsets",
+        "keyframes",
+        "full_canvas",
+        "disposals",
+        "transparent",
+    ]
+
+    def __init__(self, length, screen_size, offsets, gce_offsets, keyframes, full_canvas, disposals, transparent):
+        self.length = length
+        self.screen_size = tuple(screen_size)
+        self.offsets = list(offsets)
+        self.gce_offsets = list(gce_offsets)
+        self.keyframes = list(keyframes)
+        self.full_canvas = list(full_canvas)
+        self.disposals = list(disposals)
+        self.transparent = list(transparent)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def keyframe(self, n, disposal=False):
+        '''Returns the number of the nearest keyframe at or before frame n,
+           with disposal only frames which need no frame before them on the canvas'''
+        if disposal:
+            while n > 0 and not (self.full_canvas[n] and self.disposals[n] != 3 and not self.transparent[n]):
+                n -= 1
+            return n
+        while n > 0 and not self.keyframes[n]:
+            n -= 1
+        return n
+
+    def extension(self, n):
+        '''Returns the offset of the graphic control extension whose dict convert gives for frame n:
+           its own or, for a frame without, that of the nearest frame before it with one, -1 if none'''
+        while n >= 0 and self.gce_offsets[n] < 0:
+            n -= 1
+        return self.gce_offsets[n] if n >= 0 else -1
+
+    def to_dict(self):
+        '''Returns the index as dict of plain lists which can be stored as JSON'''
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    @classmethod
+    def from_dict(cls, index_dict):
+        '''Creates the index from a dict returned by to_dict'''
+        return cls(**index_dict)
+
+    def save(self, index_filename):
+        '''Saves the index as JSON file, e.g. next to the gif file'''
+        import json
+        with open(index_filename, "w") as index_file:
+            json.dump(self.to_dict(), index_file)
+
+    @classmethod
+    def load(cls, index_filename):
+        '''Loads an index saved with save'''
+        import json
+        with open(index_filename) as index_file:
+            return cls.from_dict(json.load(index_file))
+
+def index_frames(gif_filename, use_mmap=False):
+    """builds the FrameIndex of the gif image gif_filename in one scan of its blocks
+       without decoding any image data"""
+    _check_args(gif_filename)
+    with _open_scanner(gif_filename, use_mmap=use_mmap) as scanner:
+        return _index_scanner(scanner)
+
+def _index_scanner(scanner):
+    "builds the FrameIndex from the image descriptors and graphic control extensions of scanner"
+    offsets = []
+    gce_offsets = []
+    keyframes = []
+    full_canvas = []
+    disposals = []
+    transparent = []
+    gce_offset = -1
+    flags = 0
+    extension_seen = False
+    screen_size = scanner.image_specs["Image Size"]
+    for label, offset, value in scanner.iter_blocks(image_data=False):
+        if label == "graphic_control":
+            gce_offset = offset
+            flags = value["flags"]
+        elif label == "image":
+            # after the first extension convert takes pixels from the frame before, as it keeps the
+            # extension dict for the frames without an extension of their own
+            extension_seen = extension_seen or gce_offset >= 0
+            keyframes.append(not offsets or not extension_seen)
+            offsets.append(offset)
+            gce_offsets.append(gce_offset)
+            disposals.append((flags >> 2) & 7)
+            transparent.append(bool(flags & 1))
+            full_canvas.append(value.left == 0 and value.top == 0 and (value.width, value.height) == screen_size)
+            # a graphic control extension applies to the next image only
+            gce_offset = -1
+            flags = 0
+    return FrameIndex(scanner.image_specs["Length"], screen_size, offsets, gce_offsets, keyframes, full_canvas,
+                      disposals, transparent)
+
+def decode_frame(gif_filename, n, index=None, BGR2RGB=True, lzw_engine="table", parser="scanner", use_mmap=False,
+                 indexed=False, disposal=False, scale=1, max_size=None, limits=None):
+    """decodes only frame n of the gif image gif_filename and returns (frame, ext) as iter_frames
+       The FrameIndex index is built if not given. The image data is read at the offsets of
+       the index and only the first frame and the frames from the nearest keyframe are decoded,
+       an IndexedFrame with indexed=True needs no other frame at all.
+       limits are checked for the whole file as by convert."""
+    _check_args(gif_filename, lzw_engine, parser)
+    deadline = None if limits is None else limits.deadline()
+    if hasattr(gif_filename, "read"):
+        # a file object can be read only once
+        gif_filename = gif_filename.read()
+    if index is None:
+        index = index_frames(gif_filename, use_mmap)
+    if not 0 <= n < len(index):
+        raise IndexError("Frame number out of range")
+    keyframe = n if indexed else index.keyframe(n, disposal)
+    replay = list(range(keyframe, n+1))
+    if keyframe > 0 and not disposal:
+        # the first frame is the canvas all later frames are pasted on
+        replay.insert(0, 0)
+    with _open_scanner(gif_filename, parser, use_mmap) as scanner:
+        if index.length != scanner.image_specs["Length"]:
+            raise ValueError("Frame index does not belong to the file")
+        if limits is not None:
+            _check_limits(scanner, limits, disposal, _reduction(scanner.image_specs["Image Size"], scale, max_size))
+        decoder = _FrameDecoder(scanner, {}, BGR2RGB, lzw_engine, False, indexed, disposal, scale, max_size)
+        previous = -1
+        for i in replay:
+            gce_offset = index.gce_offsets[i]
+            if gce_offset < 0 and i - 1 != previous:
+                # the extension dict of an earlier frame, which convert gives for a frame without its own
+                gce_offset = index.extension(i)
+            if gce_offset >= 0:
+                decoder.block(*next(scanner.iter_blocks(gce_offset)))
+                if gce_offset != index.gce_offsets[i]:
+                    # it applies to its own image only when compositing after the disposal methods
+                    decoder.graphic_control = None
+            frame = decoder.block(*next(scanner.iter_blocks(index.offsets[i])))
+            previous = i
+            _check_deadline(deadline)
+    return frame, decoder.exts[-1]
+
+def convert(gif_filename, BGR2RGB=True, lzw_engine="table", parser="scanner", use_mmap=False, lzw_workers=None,
+            indexed=False, stack=False, disposal=False, scale=1, max_size=None, stats=None, frames=None, max_frames=None,
+            step=1, limits=None):
+    """converts an image specified by its filename gif_filename to a numpy image
+       gif_filename may also be the gif image itself as bytes, bytearray or memoryview or
+       a binary file object, with use_mmap a file is memory-mapped instead of read
+       if BGR2RGB is True (default) there will also be a color conversion from BGR to RGB
+       lzw_engine selects the LZW decoder: "table" (default) for lzw_decode writing into
+       a preallocated uint8 buffer, "list" for the tuple based lzw_decompress
+       parser selects the block parser: "scanner" (default) for the zero-copy BlockScanner,
+       "kaitai" for the Kaitai Struct class Gif
+       with lzw_workers, a number of processes or a concurrent.futures executor, the LZW data
+       of the frames is decompressed in parallel ahead of compositing them in order
+       with indexed=True the frames are IndexedFrame objects holding the palette indices of each
+       image with its palette and transparent index, which are expanded to colors only by to_rgb
+       with stack=True the frames are returned as one array of shape (frames, height, width, 3), into
+       which the frames are composited directly, if stack is a file name this array is a memory-mapped
+       .npy file
+       with disposal=True the frames have the size of the logical screen and are composited on one
+       running canvas after the disposal methods of the graphic control extensions, as needed for
+       optimized animations, otherwise each image is pasted on the first frame
+       with scale n > 1 or max_size the frames are reduced to every n-th row and column, or to at most
+       max_size pixels, by subsampling the palette indices, so that the full size frames are never built
+       a DecodeStats object given as stats records the time of each stage and the LZW counters per frame
+       frames, a sequence or slice of frame numbers, step and max_frames select the frames returned, e.g.
+       frames=range(10, 21), step=2 or max_frames=1, exts then holds the extension dicts of these frames only.
+       Images not needed for the selected frames are not decompressed and decoding stops after the last
+       one, so image_specs holds the data of the blocks up to it.
+       limits, a Limits object, rejects images exceeding it with ResourceLimitError, all but the time limit
+       before any image data is decompressed
+       a gif image cut off inside a block raises ValueError("Truncated gif image"), one ending after a
+       complete block without trailer is decoded up to it"""
+    _check_args(gif_filename, lzw_engine, parser, indexed, stack, max_frames, step)
+    selection = frames is not None or max_frames is not None or step != 1
+    exts = []
+    image_specs = {}
+    stacked = []
+    selected_frames = []
+    selected_exts = []
+    for frame, ext in _iter_frames(gif_filename, image_specs, exts, BGR2RGB=BGR2RGB, lzw_engine=lzw_engine,
+                                   parser=parser, use_mmap=use_mmap, lzw_workers=lzw_workers, indexed=indexed,
+                                   stack=stack, stacked=stacked, disposal=disposal, scale=scale,
+                                   max_size=max_size, stats=stats, frames=frames, max_frames=max_frames, step=step,
+                                   limits=limits):
+        selected_frames.append(frame)
+        selected_exts.append(ext)
+    frames = selected_frames
+    if selection:
+        exts = selected_exts
+    if stacked:
+        frames = stacked[0]
+        if isinstance(frames, np.memmap):
+            frames.flush()
+    return frames, exts, image_specs
+
+def thumbnail(gif_filename, max_size=128, step=0, BGR2RGB=True, disposal=False, use_mmap=False):
+    """returns a list with the first frame of the gif image gif_filename, or with every step-th frame
+       if step is set, reduced to at most max_size pixels in height and width
+       Decoding stops after the first frame if only this is needed."""
+    return [frame for frame, ext in iter_frames(gif_filename, BGR2RGB=BGR2RGB, use_mmap=use_mmap, disposal=disposal,
+                                                max_size=max_size, max_frames=None if step else 1, step=step or 1)]
+
+#================================================================
+# Decode cache
+#================================================================
+def _source_data(gif_source, use_mmap=False):
+    "returns the data of gif_source, a file name, a bytes-like object or a binary file object"
+    if _is_path(gif_source):
+        with open(gif_source, "rb") as gifread:
+            return _file_buffer(gifread, use_mmap)
+    elif hasattr(gif_source, "read"):
+        return _file_buffer(gif_source, use_mmap)
+    return gif_source
+
+def _json_encode(value):
+    "returns value with its bytes and tuples replaced by dicts tagging them, so that it can be stored as JSON"
+    if isinstance(value, bytes):
+        import base64
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_json_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_json_encode(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, _json_encode(item)) for key, item in value.items())
+    return value
+
+def _json_decode(value):
+    "object_hook of json.load restoring the bytes and tuples tagged by _json_encode"
+    if "__bytes__" in value:
+        import base64
+        return base64.b64decode(value["__bytes__"])
+    if "__tuple__" in value:
+        return tuple(value["__tuple__"])
+    return value
+
+class DecodeCache(object):
+    '''Cache of decoded gif images keyed by a hash of the file data and the decode options
+
+    The decoded frames are kept in memory in least recently used order up to max_bytes of
+    frame data. If directory is given, every decoded image is also stored there as .npy file
+    of its frames with a .json file of its metadata, which are loaded memory-mapped when they
+    are not found in memory. Neither format can execute code when loaded, so the directory
+    may be shared. The frame arrays returned are read-only as they are shared by all
+    callers. hits, misses and evictions count the lookups in memory and the entries dropped
+    from it, disk_hits the misses found in directory.'''
+
+    __slots__ = [
+        "max_bytes",
+        "directory",
+        "entries",
+        "nbytes",
+        "hits",
+        "misses",
+        "evictions",
+        "disk_hits",
+    ]
+
+    # options which do not change the result of decoding
+    _speed_options = "lzw_engine", "parser", "use_mmap", "lzw_workers", "index", "stack", "stats", "limits"
+
+    def __init__(self, max_bytes=256 << 20, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def convert(self, gif_filename, **convert_kwargs):
+        '''Returns (frames, exts, image_specs) as convert with the same arguments, from the cache if possible
+           with stack the frames are returned as one read-only array instead of a list of read-only frames'''
+        if convert_kwargs.get("indexed"):
+            raise ValueError("Indexed frames cannot be cached")
+        data = _source_data(gif_filename, convert_kwargs.get("use_mmap", False))
+        key = self.key(data, convert, convert_kwargs)
+        entry = self.lookup(key)
+        if entry is None:
+            kwargs = dict(convert_kwargs, stack=True)
+            frames, exts, image_specs = convert(data, **kwargs)
+            entry = self.store(key, frames, (exts, image_specs))
+        frames, (exts, image_specs) = entry
+        if not convert_kwargs.get("stack"):
+            frames = list(frames)
+        return frames, copy.deepcopy(exts), copy.deepcopy(image_specs)
+
+    def decode_frame(self, gif_filename, n, **decode_kwargs):
+        '''Returns (frame, ext) as decode_frame with the same arguments, from the cache if possible'''
+        if decode_kwargs.get("indexed"):
+            raise ValueError("Indexed frames cannot be cached")
+        data = _source_data(gif_filename, decode_kwargs.get("use_mmap", False))
+        key = self.key(data, decode_frame, dict(decode_kwargs, n=n))
+        entry = self.lookup(key)
+        if entry is None:
+            frame, ext = decode_frame(data, n, **decode_kwargs)
+            entry = self.store(key, frame, ext)
+        frame, ext = entry
+        return frame, copy.deepcopy(ext)
+
+    def key(self, data, function, kwargs):
+        '''Returns the hex digest identifying the result of function for the gif data and the arguments
+           kwargs, arguments left out and given with their default value give the same key'''
+        import hashlib, inspect
+        arguments = inspect.signature(function).bind(data, **kwargs)
+        arguments.apply_defaults()
+        options = sorted((name, value) for name, value in arguments.arguments.items()
+                         if name not in ("gif_filename",) + self._speed_options)
+        digest = hashlib.sha256(data)
+        digest.update(repr((function.__name__, options)).encode())
+        return digest.hexdigest()
+
+    def lookup(self, key):
+        '''Returns the entry (frames, metadata) of key or None, from memory or else from directory'''
+        entries = self.entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+        self.misses += 1
+        if self.directory is None:
+            return None
+        frames_filename, meta_filename = self._filenames(key)
+        if not (os.path.isfile(frames_filename) and os.path.isfile(meta_filename)):
+            return None
+        import json
+        frames = np.load(frames_filename, mmap_mode="r", allow_pickle=False)
+        with open(meta_filename) as meta_file:
+            meta = json.load(meta_file, object_hook=_json_decode)
+        self.disk_hits += 1
+        return self._insert(key, frames, meta)
+
+    def store(self, key, frames, meta):
+        '''Stores the frames array with its metadata under key and returns the entry (frames, metadata)'''
+        frames.flags.writeable = False
+        if self.directory is not None:
+            frames_filename, meta_filename = self._filenames(key)
+            # written under a temporary name first, so that no other process reads a partial file
+            import json
+            np.save(frames_filename + ".tmp.npy", frames, allow_pickle=False)
+            with open(meta_filename + ".tmp", "w") as meta_file:
+                json.dump(_json_encode(meta), meta_file)
+            os.replace(frames_filename + ".tmp.npy", frames_filename)
+            os.replace(meta_filename + ".tmp", meta_filename)
+        return self._insert(key, frames, meta)
+
+    def clear(self):
+        '''Removes all entries from memory, the files in directory are kept'''
+        self.entries.clear()
+        self.nbytes = 0
+
+    def _insert(self, key, frames, meta):
+        '''Keeps the entry in memory if it fits and evicts the least recently used entries beyond max_bytes'''
+        entry = frames, meta
+        if frames.nbytes > self.max_bytes:
+            return entry
+        self.entries[key] = entry
+        self.nbytes += frames.nbytes
+        while self.nbytes > self.max_bytes:
+            old_key, (old_frames, old_meta) = self.entries.popitem(last=False)
+            self.nbytes -= old_frames.nbytes
+            self.evictions += 1
+        return entry
+
+    def _filenames(self, key):
+        return os.path.join(self.directory, key + ".npy"), os.path.join(self.directory, key + ".json")
+
+#================================================================
+# Batch conversion
+#================================================================
+def _batch_worker(gif_filename, convert_kwargs, shared_memory):
+    "converts gif_filename in a worker process, the frames are put into shared memory if shared_memory"
+    frames, exts, image_specs = convert(gif_filename, **convert_kwargs)
+    if not shared_memory:
+        return frames, exts, image_specs
+    from multiprocessing.shared_memory import SharedMemory
+    size = max(sum(frame.nbytes for frame in frames), 1)
+    try:
+        shm = SharedMemory(create=True, size=size, track=False)
+    except TypeError:
+        # before Python 3.13 the block is always tracked, but it is unlinked by the parent
+        # and must not be removed by the resource tracker of the worker process
+        from multiprocessing import resource_tracker
+        shm = SharedMemory(create=True, size=size)
+        resource_tracker.unregister(shm._name, "shared_memory")
+    pos = 0
+    for frame in frames:
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf, offset=pos)[...] = frame
+        pos += frame.nbytes
+    name = shm.name
+    shm.close()
+    return name, [frame.shape for frame in frames], exts, image_specs
+
+def _batch_result(result, shared_memory):
+    "returns the tuple of convert from the result of _batch_worker, copying the frames out of shared memory"
+    if not shared_memory:
+        return result
+    from multiprocessing.shared_memory import SharedMemory
+    name, shapes, exts, image_specs = result
+    shm = SharedMemory(name)
+    try:
+        frames = []
+        pos = 0
+        for shape in shapes:
+            frame = np.empty(shape, dtype=np.uint8)
+            frame.reshape(-1)[:] = np.frombuffer(shm.buf, dtype=np.uint8, count=frame.size, offset=pos)
+            frames.append(frame)
+            pos += frame.nbytes
+    finally:
+        shm.close()
+        shm.unlink()
+    return frames, exts, image_specs
+
+def _batch_discard(future, shared_memory):
+    "waits for the conversion of future, which is no longer yielded, and frees its shared memory"
+    if not shared_memory:
+        return
+    from multiprocessing.shared_memory import SharedMemory
+    try:
+        name = future.result()[0]
+    except Exception:
+        return
+    shm = SharedMemory(name)
+    shm.close()
+    shm.unlink()
+
+def convert_batch(gif_filenames, max_workers=None, ordered=True, shared_memory=False, executor=None, **convert_kwargs):
+    """converts many gif images in parallel worker processes and yields tuples (gif_filename, result, error)
+       gif_filenames is a list of file names or a glob pattern, result is the tuple (frames, exts, image_specs)
+       of convert, or None if the conversion of this file raised the exception error.
+       The results come in the order of gif_filenames or, if ordered is False, as soon as they are ready.
+       With shared_memory the frames are passed back in shared memory instead of being pickled, if the
+       generator is closed early the conversions already started are waited for and their memory freed.
+       executor may be a ProcessPoolExecutor to use, otherwise one with max_workers processes is created.
+       The other keyword arguments are passed on to convert."""
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    import glob
+    if _is_path(gif_filenames):
+        gif_filenames = sorted(glob.glob(gif_filenames))
+    # indexed frames are small and are always pickled
+    shared_memory = shared_memory and not convert_kwargs.get("indexed")
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers)
+    # bound the number of pending conversions, so that results do not pile up
+    window = 4 * (max_workers or os.cpu_count() or 1)
+    gif_filenames = iter(gif_filenames)
+    pending = []
+    try:
+        while True:
+            for gif_filename in gif_filenames:
+                pending.append((executor.submit(_batch_worker, gif_filename, convert_kwargs, shared_memory), gif_filename))
+                if len(pending) >= window:
+                    break
+            if not pending:
+                break
+            if ordered:
+                done = [pending[0]]
             else:
-                old_frame = frames[-1].copy()
-                if has_color_table:
-                    if BGR2RGB:
-                        transp_idx = local_color_table[exts[-1]['transparent_idx']][::-1] # RGB -> BGR
-                    else:
-                        transp_idx = local_color_table[exts[-1]['transparent_idx']] # RGB -> RGB
+                done_futures = wait([future for future, gif_filename in pending], return_when=FIRST_COMPLETED)[0]
+                done = [item for item in pending if item[0] in done_futures]
+            for item in done:
+                pending.remove(item)
+                future, gif_filename = item
+                try:
+                    result = _batch_result(future.result(), shared_memory)
+                except Exception as error:
+                    yield gif_filename, None, error
                 else:
-                    if BGR2RGB:
-                        transp_idx = color_table[exts[-1]['transparent_idx']][::-1] # RGB -> BGR
-                    else:
-                        transp_idx = color_table[exts[-1]['transparent_idx']] # RGB -> RGB
-                transp_idx = np.array(transp_idx)
-                # cv2.imshow("old_frame", old_frame)
-                new_frame = paste(frame1.copy(), np_image, exts[-1]['left'], exts[-1]['top'])
-                # cv2.imshow("new_frame", new_frame)
-                f = np.all((new_frame==transp_idx), axis=-1)
-                flattened_image = np.reshape(new_frame, (new_frame.shape[0]*new_frame.shape[1], channels))
-                old_flattened_image = np.reshape(old_frame, (old_frame.shape[0]*old_frame.shape[1], channels))
-                f = np.reshape(f, (old_frame.shape[0]*old_frame.shape[1], 1))
-                np_image = np.array([old_flattened_image[i] if j else flattened_image[i] for i, j in enumerate(f)])
-                np_image = np.reshape(np_image, (old_frame.shape[0], old_frame.shape[1], channels))
-                # cv2.imshow("last_frame", np_image)
-                # cv2.waitKey()
-            frames.append(np_image)
-        elif data.blocks[i].block_type == Gif.BlockType.extension:
-            label = data.blocks[i].body.label
-            # print("label of extension", label)
-            if label == Gif.ExtensionLabel.graphic_control:
-                body = data.blocks[i].body.body
-                # print("body, label of extension", body, label)
-                block_size = data.blocks[i].body.body.block_size
-                flags = data.blocks[i].body.body.flags
-                delay_time = data.blocks[i].body.body.delay_time
-                transparent_idx = data.blocks[i].body.body.transparent_idx
-                terminator = data.blocks[i].body.body.terminator
-                frame_count = len(frames)
-                ext_dict = {"block_size": block_size, "flags": flags, "delay_time": delay_time, "transparent_idx": transparent_idx, "terminator": terminator}
-                exts.append(ext_dict)
-                # print(i, "block_size, flags, delay_time, transparent_idx, terminator", block_size, flags, delay_time, transparent_idx, terminator)
-            elif label == Gif.ExtensionLabel.application:
-                application_id = data.blocks[i].body.body.application_id
-                subblocks = data.blocks[i].body.body.subblocks
-                image_specs["application_id"] = application_id.bytes 
-                for k in range(len(subblocks)):
-                    image_specs["application_subblocks"+str(k)] = subblocks[k].bytes
-            elif label == Gif.ExtensionLabel.comment:
-                subblocks = data.blocks[i].body.body
-                image_specs["comment"] = b"".join([b.bytes for b in subblocks.entries])
-        else: # data.blocks[i].block_type == Gif.BlockType.end_of_file
-            pass
-    return frames, exts, image_specs
+                    yield gif_filename, result, None
+    finally:
+        # conversions already running or done when the caller stops early cannot be cancelled,
+        # their shared memory blocks are unlinked here as nobody else takes them
+        started = [future for future, gif_filename in pending if not future.cancel()]
+        for future in started:
+            _batch_discard(future, shared_memory)
+        if own_executor:
+            executor.shutdown()
+
+def main(argv=None):
+    """command line interface, converts the gif files given by names or glob patterns in parallel
+       and saves the frames and delay times of each as .npz file"""
+    import argparse
+    import glob
+    parser = argparse.ArgumentParser(prog="gif2numpy", description="Converts gif images to numpy .npz files")
+    parser.add_argument("gif_files", nargs="+", help="gif file names or glob patterns")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes, default one per CPU")
+    parser.add_argument("-o", "--output-dir", default=None, help="directory for the .npz files, default next to the gif files")
+    parser.add_argument("--rgb", action="store_true", help="save RGB instead of BGR frames")
+    parser.add_argument("--unordered", action="store_true", help="save the files as they are converted")
+    parser.add_argument("--shared-memory", action="store_true", help="pass the frames from the workers in shared memory")
+    parser.add_argument("--disposal", action="store_true", help="composite the frames after their disposal methods")
+    args = parser.parse_args(argv)
+    gif_filenames = []
+    for pattern in args.gif_files:
+        # names without match are kept, so that they are reported as error
+        gif_filenames.extend(sorted(glob.glob(pattern)) or [pattern])
+    errors = 0
+    for gif_filename, result, error in convert_batch(gif_filenames, args.workers, not args.unordered,
+                                                     args.shared_memory, BGR2RGB=not args.rgb,
+                                                     disposal=args.disposal):
+        if error is not None:
+            print("%s: %s" % (gif_filename, error), file=sys.stderr)
+            errors += 1
+            continue
+        frames, exts, image_specs = result
+        output_dir = args.output_dir or os.path.dirname(gif_filename)
+        npz_filename = os.path.join(output_dir, os.path.splitext(os.path.basename(gif_filename))[0] + ".npz")
+        np.savez(npz_filename, frames=np.array(frames), delay_times=np.array([ext.get("delay_time", 0) for ext in exts]))
+        print(gif_filename, "->", npz_filename, len(frames), "frames")
+    return 1 if errors else 0
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sys.exit(main())
     import cv2
     images = "Images/hopper.gif", "Images/audrey.gif", "Images/Rotating_earth.gif", "Images/testcolors.gif"
     for image in images:
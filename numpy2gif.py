@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Encoder of numpy images to gif images, the counterpart of gif2numpy.convert
+
+The palette of all frames is built by median cut over the whole frame stack, or taken
+exactly if the frames use at most 256 colors, the colors are mapped to palette indices
+through a precomputed 3-D lookup table and the indices are LZW compressed with a hash
+indexed dictionary and packed into data sub-blocks:
+
+    frames, exts, image_specs = gif2numpy.convert("Images/Rotating_earth.gif")
+    numpy2gif.convert(frames, "earth.gif", delay_time=[ext["delay_time"] for ext in exts])
+"""
+
+import struct
+import numpy as np
+version = "1.3"
+
+#================================================================
+# Palette quantization
+#================================================================
+def _packed_colors(pixels):
+    "packs the (N, 3) uint8 colors pixels into uint32 values 0xC0C1C2 which sort like the color tuples"
+    pixels = pixels.astype(np.uint32)
+    return (pixels[:, 0] << 16) | (pixels[:, 1] << 8) | pixels[:, 2]
+
+def _unpacked_colors(packed):
+    "unpacks uint32 values of _packed_colors into (N, 3) uint8 colors"
+    return np.stack([packed >> 16, (packed >> 8) & 255, packed & 255], axis=-1).astype(np.uint8)
+
+def distinct_colors(frames, max_pixels=1 << 22):
+    '''Returns the distinct colors of the frames as (N, 3) uint8 array together with their pixel counts
+       Of more than max_pixels pixels only an evenly spaced sample is counted.'''
+    pixels = np.concatenate([np.reshape(frame, (-1, 3)) for frame in frames])
+    if len(pixels) > max_pixels:
+        pixels = pixels[::-(-len(pixels) // max_pixels)]
+    packed, counts = np.unique(_packed_colors(pixels), return_counts=True)
+    return _unpacked_colors(packed), counts
+
+def median_cut(colors, counts, size=256):
+    '''Returns a palette of at most size colors for the (N, 3) uint8 colors with their pixel counts
+
+    The box of colors with the largest product of pixel count and color range is split at the
+    weighted median of its widest channel until there are size boxes, each palette color is
+    the weighted mean of the colors in its box.'''
+    def score(box):
+        if len(box) < 2:
+            return -1
+        return int(np.ptp(colors[box], axis=0).max()) * int(counts[box].sum())
+    boxes = [np.arange(len(colors))]
+    scores = [score(boxes[0])]
+    while len(boxes) < size:
+        i = int(np.argmax(scores))
+        if scores[i] <= 0:
+            break
+        box = boxes.pop(i)
+        scores.pop(i)
+        channel = int(np.argmax(np.ptp(colors[box], axis=0)))
+        box = box[np.argsort(colors[box, channel], kind="stable")]
+        weights = np.cumsum(counts[box])
+        split = int(np.searchsorted(weights, weights[-1] / 2.0))
+        split = min(max(split, 1), len(box) - 1)
+        for half in (box[:split], box[split:]):
+            boxes.append(half)
+            scores.append(score(half))
+    palette = [np.average(colors[box], axis=0, weights=counts[box]) for box in boxes]
+    return np.clip(np.round(palette), 0, 255).astype(np.uint8)
+
+def palette_lut(palette, bits=5):
+    '''Returns the 3-D lookup table of shape (2**bits, 2**bits, 2**bits) with the index of the
+       nearest palette color for the center of every cell of the color cube'''
+    cells = 1 << bits
+    shift = 8 - bits
+    centers = (np.arange(cells) << shift) + (1 << shift >> 1)
+    grid = np.stack(np.meshgrid(centers, centers, centers, indexing="ij"), axis=-1).reshape(-1, 1, 3)
+    palette = palette.astype(np.int32)
+    lut = np.empty(len(grid), dtype=np.uint8)
+    # in chunks, the distances of all cells to all colors would take too much memory at once
+    for start in range(0, len(grid), 4096):
+        distances = ((grid[start:start+4096] - palette) ** 2).sum(axis=-1)
+        lut[start:start+4096] = np.argmin(distances, axis=1)
+    return lut.reshape(cells, cells, cells)
+
+def quantize(frame, palette, lut=None):
+    '''Maps the (height, width, 3) uint8 frame to a (height, width) uint8 array of palette indices,
+       through the lookup table lut of palette_lut, without it every color must be in the palette'''
+    if lut is None:
+        # exact mapping, the palette is sorted by its packed colors
+        return np.searchsorted(_packed_colors(palette), _packed_colors(frame.reshape(-1, 3))) \
+                 .astype(np.uint8).reshape(frame.shape[:2])
+    shift = 8 - (len(lut) - 1).bit_length()
+    return lut[frame[..., 0] >> shift, frame[..., 1] >> shift, frame[..., 2] >> shift]
+
+#================================================================
+# LZW compression
+#================================================================
+def lzw_compress(indices, lzw_min):
+    '''LZW compresses the palette indices, a sequence of ints, with the code sizes of the gif format
+       The dictionary is a dict indexed by prefix code and next index. A clear code is written when
+       the code table is full.'''
+    clear = 1 << lzw_min
+    code_size = lzw_min + 1
+    next_code = clear + 2
+    table = {}
+    out = bytearray()
+    acc = clear
+    nbits = code_size
+    # an image without pixels holds the clear and the end code only
+    if len(indices):
+        prefix = indices[0]
+        for k in indices[1:]:
+            key = (prefix << 8) | k
+            code = table.get(key)
+            if code is not None:
+                prefix = code
+                continue
+            acc |= prefix << nbits
+            nbits += code_size
+            if next_code < 4096:
+                table[key] = next_code
+                next_code += 1
+                if next_code > (1 << code_size) and code_size < 12:
+                    code_size += 1
+            else:
+                acc |= clear << nbits
+                nbits += code_size
+                table = {}
+                next_code = clear + 2
+                code_size = lzw_min + 1
+            while nbits >= 8:
+                out.append(acc & 0xFF)
+                acc >>= 8
+                nbits -= 8
+            prefix = k
+        acc |= prefix << nbits
+        nbits += code_size
+        if next_code == (1 << code_size) and code_size < 12:
+            code_size += 1
+    acc |= (clear + 1) << nbits
+    nbits += code_size
+    while nbits > 0:
+        out.append(acc & 0xFF)
+        acc >>= 8
+        nbits -= 8
+    return bytes(out)
+
+def pack_subblocks(data):
+    '''Packs data into data sub-blocks of at most 255 bytes with the terminating empty sub-block'''
+    out = bytearray()
+    for pos in range(0, len(data), 255):
+        chunk = data[pos:pos+255]
+        out.append(len(chunk))
+        out += chunk
+    out.append(0)
+    return bytes(out)
+
+#================================================================
+# Gif blocks
+#================================================================
+def header():
+    "returns the Header block"
+    return b"GIF89a"
+
+def logical_screen(width, height, color_table_size, background=0):
+    "returns the logical screen descriptor with a global color table of 2**color_table_size entries"
+    return struct.pack("<HHBBB", width, height, 0x80 | 0x70 | (color_table_size - 1), background, 0)
+
+def netscape_loop(loop_count=0):
+    "returns the NETSCAPE2.0 application extension repeating the animation loop_count times, 0 for ever"
+    return b"\x21\xFF\x0BNETSCAPE2.0\x03\x01" + struct.pack("<H", loop_count) + b"\x00"
+
+def graphic_control(delay_time=0, disposal=0, transparent_idx=None):
+    "returns the graphic control extension of the next image with delay_time in 1/100 s"
+    flags = (disposal & 7) << 2
+    if transparent_idx is not None:
+        flags |= 1
+    return struct.pack("<BBBBHBB", 0x21, 0xF9, 4, flags, delay_time, transparent_idx or 0, 0)
+
+def image(indices, lzw_min, left=0, top=0):
+    "returns the image descriptor and the LZW compressed data sub-blocks of the (height, width) palette indices"
+    height, width = indices.shape
+    data = lzw_compress(np.ravel(indices).tolist(), lzw_min)
+    return struct.pack("<BHHHHB", 0x2C, left, top, width, height, 0) + bytes(bytearray([lzw_min])) \
+             + pack_subblocks(data)
+
+def trailer():
+    "returns the trailer ending the gif image"
+    return b"\x3B"
+
+#================================================================
+# Conversion
+#================================================================
+def _changed_rect(indices, previous):
+    "returns (top, bottom, left, right) of the rectangle around the pixels that differ from previous"
+    changed = indices != previous
+    rows = np.flatnonzero(changed.any(axis=1))
+    if not len(rows):
+        return 0, 1, 0, 1
+    cols = np.flatnonzero(changed.any(axis=0))
+    return rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+
+def convert(frames, gif_filename=None, BGR2RGB=True, delay_time=10, loop_count=0, colors=256, optimize=False):
+    """converts the numpy images frames to a gif image and returns it as bytes, which are also written to
+       the file gif_filename if given
+       frames is one (height, width, 3) uint8 image, a sequence of them or an array of shape
+       (frames, height, width, 3) as returned by gif2numpy.convert
+       if BGR2RGB is True (default) the frames are in BGR order as from gif2numpy.convert and cv2
+       delay_time is the delay of every frame in 1/100 s or a sequence with the delay of each frame,
+       which must have one entry per frame,
+       loop_count the number of repetitions of an animation, 0 for ever
+       the palette of at most colors colors is shared by all frames, it holds the exact colors if the
+       frames use no more, otherwise it is built by median cut
+       with optimize=True only the rectangle changed from the frame before is stored, such files are
+       decoded correctly by gif2numpy.convert with disposal=True"""
+    frames = np.asarray(frames) if not isinstance(frames, (list, tuple)) else frames
+    if isinstance(frames, np.ndarray) and frames.ndim == 3:
+        frames = [frames]
+    if not len(frames):
+        raise ValueError("No frames")
+    height, width = frames[0].shape[:2]
+    for frame in frames:
+        if frame.shape != (height, width, 3):
+            raise ValueError("Frames must be color images of the same size")
+    if not 2 <= colors <= 256:
+        raise ValueError("Number of colors must be from 2 to 256")
+    if np.ndim(delay_time) == 0:
+        delay_time = [delay_time] * len(frames)
+    elif len(delay_time) != len(frames):
+        raise ValueError("Number of delay times must match the number of frames")
+    delay_time = [int(delay) for delay in delay_time]
+    frames = [np.asarray(frame, dtype=np.uint8) for frame in frames]
+    distinct, counts = distinct_colors(frames, max_pixels=np.inf)
+    if len(distinct) <= colors:
+        palette, lut = distinct, None
+    else:
+        distinct, counts = distinct_colors(frames)
+        palette = median_cut(distinct, counts, colors)
+        lut = palette_lut(palette)
+    color_table_size = max(int(len(palette) - 1).bit_length(), 1)
+    color_table = np.zeros((1 << color_table_size, 3), dtype=np.uint8)
+    color_table[:len(palette)] = palette[:, ::-1] if BGR2RGB else palette
+    lzw_min = max(color_table_size, 2)
+    out = [header(), logical_screen(width, height, color_table_size), color_table.tobytes()]
+    if len(frames) > 1:
+        out.append(netscape_loop(loop_count))
+    previous = None
+    for frame, delay in zip(frames, delay_time):
+        indices = quantize(frame, palette, lut)
+        if optimize and previous is not None:
+            top, bottom, left, right = _changed_rect(indices, previous)
+            out.append(graphic_control(delay, 1))
+            out.append(image(indices[top:bottom, left:right], lzw_min, left, top))
+        else:
+            out.append(graphic_control(delay, 1 if optimize else 0))
+            out.append(image(indices, lzw_min))
+        previous = indices
+    out.append(trailer())
+    gif = b"".join(out)
+    if gif_filename is not None:
+        with open(gif_filename, "wb") as gif_file:
+            gif_file.write(gif)
+    return gif
@@ -8,8 +8,8 @@ setup(
     author_email='abunkahle@t-online.de',
     description='Convert single and multiple frame gif images to numpy images or to OpenCV without PIL or pillow',
     license='MIT',
-    py_modules=['gif2numpy'],
-    python_requires='>=2.7',
+    py_modules=['gif2numpy', 'numpy2gif'],
+    python_requires='>=3.7',
     url='https://github.com/bunkahle/gif2numpy',
     long_description=open('README.txt').read(),
     platforms = ['any'],
@@ -24,9 +24,7 @@ setup(
     'License :: OSI Approved :: MIT License',
     # Specify the Python versions you support here. In particular, ensure
     # that you indicate whether you support Python 2, Python 3 or both.
-    'Programming Language :: Python :: 2',
-    'Programming Language :: Python :: 2.7',
     'Programming Language :: Python :: 3',
-    'Programming Language :: Python :: 3.6',
+    'Programming Language :: Python :: 3 :: Only',
     'Programming Language :: Python :: 3.7'],
 )
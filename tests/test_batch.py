@@ -0,0 +1,27 @@
+import os
+import pytest
+import gif2numpy
+from conftest import IMAGES
+
+
+def shared_memory_blocks():
+    return set(name for name in os.listdir("/dev/shm") if name.startswith("psm_"))
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="shared memory blocks are not listed in /dev/shm")
+@pytest.mark.parametrize("ordered", [True, False])
+def test_early_stop_frees_shared_memory(ordered):
+    before = shared_memory_blocks()
+    batch = gif2numpy.convert_batch(IMAGES * 3, max_workers=2, ordered=ordered, shared_memory=True)
+    gif_filename, result, error = next(batch)
+    assert error is None
+    batch.close()
+    assert shared_memory_blocks() == before
+
+
+def test_batch_matches_convert():
+    for gif_filename, result, error in gif2numpy.convert_batch(IMAGES, max_workers=2, shared_memory=True):
+        assert error is None
+        frames = gif2numpy.convert(gif_filename)[0]
+        assert len(result[0]) == len(frames)
+        assert all((a == b).all() for a, b in zip(result[0], frames))
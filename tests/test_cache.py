@@ -0,0 +1,28 @@
+import json
+import os
+import numpy as np
+import gif2numpy
+from conftest import IMAGES
+
+
+def test_disk_cache_round_trip(tmp_path):
+    for gif_filename in IMAGES:
+        frames, exts, image_specs = gif2numpy.convert(gif_filename)
+        gif2numpy.DecodeCache(directory=str(tmp_path)).convert(gif_filename)
+        cache = gif2numpy.DecodeCache(directory=str(tmp_path))
+        cached_frames, cached_exts, cached_image_specs = cache.convert(gif_filename)
+        assert cache.disk_hits == 1
+        assert all(np.array_equal(a, b) for a, b in zip(cached_frames, frames))
+        assert cached_exts == exts
+        assert cached_image_specs == image_specs
+    frame, ext = gif2numpy.DecodeCache(directory=str(tmp_path)).decode_frame(IMAGES[0], 0)
+    assert gif2numpy.DecodeCache(directory=str(tmp_path)).decode_frame(IMAGES[0], 0)[1] == ext
+
+
+def test_disk_cache_metadata_is_json(tmp_path):
+    gif2numpy.DecodeCache(directory=str(tmp_path)).convert(IMAGES[0])
+    names = sorted(os.listdir(str(tmp_path)))
+    assert [os.path.splitext(name)[1] for name in names] == [".json", ".npy"]
+    with open(os.path.join(str(tmp_path), names[0])) as meta_file:
+        exts, image_specs = json.load(meta_file)["__tuple__"]
+    assert exts[0]["block_size"] == {"__bytes__": "BA=="}
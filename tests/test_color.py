@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import gif2numpy
+
+
+def image(channels):
+    return np.random.RandomState(4).randint(0, 256, size=(5, 7, channels)).astype(np.uint8)
+
+
+@pytest.mark.parametrize("channels", [3, 4])
+def test_cvtColor_new_array(channels):
+    bgr = image(channels)
+    rgb = gif2numpy.cvtColor(bgr)
+    assert rgb is not bgr
+    assert np.array_equal(rgb[..., :3], bgr[..., 2::-1])
+    assert np.array_equal(rgb[..., 3:], bgr[..., 3:])
+    assert np.array_equal(gif2numpy.cvtColor(rgb), bgr)
+
+
+@pytest.mark.parametrize("channels", [3, 4])
+def test_cvtColor_out(channels):
+    bgr = image(channels)
+    out = np.zeros_like(bgr)
+    assert gif2numpy.cvtColor(bgr, out=out) is out
+    assert np.array_equal(out, gif2numpy.cvtColor(bgr))
+
+
+@pytest.mark.parametrize("channels", [3, 4])
+def test_cvtColor_in_place(channels):
+    bgr = image(channels)
+    expected = gif2numpy.cvtColor(bgr)
+    assert gif2numpy.cvtColor(bgr, out=bgr) is bgr
+    assert np.array_equal(bgr, expected)
+
+
+def test_cvtColor_in_place_on_view():
+    frames = np.stack([image(3)] * 2)
+    expected = gif2numpy.cvtColor(frames[1])
+    gif2numpy.cvtColor(frames[1], out=frames[1])
+    assert np.array_equal(frames[1], expected)
+    assert np.array_equal(frames[0], image(3))
+
+
+def test_cvtColor_gray_is_unchanged():
+    gray = image(3)[..., 0]
+    assert gif2numpy.cvtColor(gray) is gray
+    out = np.zeros_like(gray)
+    assert np.array_equal(gif2numpy.cvtColor(gray, out=out), gray)
+
+
+def test_BGR2RGB_of_convert_equals_cvtColor(gif_filename):
+    frames = gif2numpy.convert(gif_filename)[0]
+    rgb_frames = gif2numpy.convert(gif_filename, BGR2RGB=False)[0]
+    assert all(np.array_equal(gif2numpy.cvtColor(frame), rgb) for frame, rgb in zip(frames[:3], rgb_frames[:3]))
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+import gif2numpy
+from conftest import PALETTE, disposal_gif, make_gif
+
+
+def test_transparent_index_without_flag_takes_old_pixels():
+    first = np.full((8, 8), 1)
+    second = np.full((8, 8), 2)
+    second[:4] = 3
+    third = np.full((8, 8), 3)
+    third[:, :4] = 0
+    # the transparent color flag is not set, version 1.3 takes the pixels of color 3 from the old frame
+    gif = make_gif([(0, 0, first, None), (0, 0, second, (0, 0, 3)), (0, 0, third, (0, 0, 3))])
+    frames = gif2numpy.convert(gif, BGR2RGB=False)[0]
+    assert np.array_equal(frames[1], PALETTE[np.where(second == 3, first, second)])
+    assert np.array_equal(frames[2], PALETTE[np.where(third == 3, np.where(second == 3, first, second), third)])
+    index = gif2numpy.index_frames(gif)
+    assert [index.keyframe(n) for n in range(3)] == [0, 0, 0]
+
+
+def test_deinterlace_rows_cache_is_bounded():
+    for height in range(1, 2 * gif2numpy._deinterlace_cache_size):
+        rows = gif2numpy.deinterlace_rows(height)
+        assert sorted(rows.tolist()) == list(range(height))
+    assert len(gif2numpy._deinterlace_cache) == gif2numpy._deinterlace_cache_size
+    assert np.array_equal(gif2numpy.deinterlace_rows(5), [0, 3, 2, 4, 1])
+
+
+def test_indexed_transparent_idx_of_own_extension():
+    sprite = np.full((4, 4), 2)
+    sprite[1:3, 1:3] = 0
+    # frame 1 has no graphic control extension, so it is opaque although exts carries that of frame 0
+    gif = make_gif([(0, 0, sprite, (0, 1, 0)), (2, 2, sprite, None), (4, 4, sprite, (0, 0, 0)), (0, 4, sprite, (1, 1, 2))])
+    expected = [0, None, None, 2]
+    frames = gif2numpy.convert(gif, indexed=True)[0]
+    assert [frame.transparent_idx for frame in frames] == expected
+    assert [frame.transparent_idx for frame, ext in gif2numpy.iter_frames(gif, indexed=True)] == expected
+    assert [gif2numpy.decode_frame(gif, n, indexed=True)[0].transparent_idx for n in range(4)] == expected
+    assert [transparent_idx if transparent else None for transparent, transparent_idx
+            in gif2numpy.metadata(gif).frames[["transparent", "transparent_idx"]].tolist()] == expected
+
+
+@pytest.mark.parametrize("disposal", [False, True])
+def test_decode_frame_matches_convert(gif_source, disposal):
+    frames = gif2numpy.convert(gif_source, disposal=disposal)[0]
+    index = gif2numpy.index_frames(gif_source)
+    # the frames of Rotating_earth.gif all depend on the first, the first ten show the pattern
+    for n, frame in enumerate(frames[:10]):
+        assert np.array_equal(gif2numpy.decode_frame(gif_source, n, index, disposal=disposal)[0], frame), n
+        assert np.array_equal(gif2numpy.convert(gif_source, frames=[n], disposal=disposal)[0][0], frame), n
+
+
+def test_disposal_index():
+    index = gif2numpy.index_frames(disposal_gif())
+    assert index.disposals == [1, 1, 3, 2, 0, 0, 3, 0, 0, 0]
+    assert [offset >= 0 for offset in index.gce_offsets] == [True] * 4 + [False, False, True, False, True, True]
+    # frame 2 restores the screen from before it, frame 5 has no extension of its own
+    assert index.keyframe(3, disposal=True) == 0
+    assert index.keyframe(5, disposal=True) == 5
+    assert index.keyframe(9, disposal=True) == 8
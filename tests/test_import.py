@@ -0,0 +1,27 @@
+import subprocess
+import sys
+import pytest
+
+LAZY_MODULES = ["kaitaistruct", "pkg_resources"]
+
+
+def run(code):
+    return subprocess.check_output([sys.executable, "-c", code], universal_newlines=True).split()
+
+
+def test_import_is_lazy():
+    loaded = run("import sys, gif2numpy; print(' '.join(sorted(sys.modules)), len(gif2numpy._kaitai))")
+    assert [name for name in LAZY_MODULES if name in loaded] == []
+    # the Kaitai Struct classes are not built either
+    assert loaded[-1] == "0"
+
+
+def test_kaitai_classes_on_access():
+    pytest.importorskip("kaitaistruct")
+    assert run("import sys; from gif2numpy import Gif, GifStream, KaitaiStream; "
+               "print(Gif.__name__, GifStream.__name__, 'kaitaistruct' in sys.modules)") == ["Gif", "GifStream", "True"]
+
+
+def test_unknown_attribute():
+    with pytest.raises(subprocess.CalledProcessError):
+        subprocess.check_call([sys.executable, "-c", "import gif2numpy; gif2numpy.NoSuchName"], stderr=subprocess.DEVNULL)
@@ -0,0 +1,79 @@
+import struct
+import tracemalloc
+import numpy as np
+import pytest
+import gif2numpy
+from conftest import make_gif
+
+FRAMES = 6
+
+
+def frames_gif():
+    rng = np.random.RandomState(2)
+    return make_gif([(0, 0, rng.randint(0, 4, size=(8, 8)), (0, 0, 0)) for i in range(FRAMES)])
+
+
+def big_screen_gif():
+    return make_gif([(0, 0, np.zeros((4, 4)), None)], screen=(65535, 65535))
+
+
+def big_image_gif():
+    # the image descriptor after the header and the color table of 4 colors claims 65535 x 65535 pixels
+    gif = make_gif([(0, 0, np.zeros((4, 4)), None)])
+    return gif[:30] + struct.pack("<HH", 65535, 65535) + gif[34:]
+
+
+READERS = {
+    "convert": lambda gif, limits: gif2numpy.convert(gif, limits=limits),
+    "disposal": lambda gif, limits: gif2numpy.convert(gif, disposal=True, limits=limits),
+    "decode_frame": lambda gif, limits: gif2numpy.decode_frame(gif, 0, limits=limits),
+    "iter_frames": lambda gif, limits: next(gif2numpy.iter_frames(gif, limits=limits)),
+    "stream": lambda gif, limits: gif2numpy.StreamDecoder(limits=limits).feed(gif),
+}
+
+CASES = {
+    "screen": (big_screen_gif, gif2numpy.Limits(pixels=4096 * 4096), "Pixels of 4294836225"),
+    "image": (big_image_gif, gif2numpy.Limits(pixels=4096 * 4096), "Pixels of 4294836225"),
+    "frames": (frames_gif, gif2numpy.Limits(frames=FRAMES - 1), "Frames of 6"),
+    # every 8 x 8 frame decodes to 64 palette indices and 192 bytes of colors
+    "decoded_bytes": (frames_gif, gif2numpy.Limits(decoded_bytes=256 * FRAMES - 1), "Decoded bytes of 1536"),
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+@pytest.mark.parametrize("reader", sorted(READERS))
+def test_limit_rejects_before_decoding(reader, case, monkeypatch):
+    gif_source, limits, message = CASES[case]
+    gif = gif_source()
+    decompressed = []
+    decompress = gif2numpy._decompress
+    monkeypatch.setattr(gif2numpy, "_decompress", lambda *args: decompressed.append(1) or decompress(*args))
+    tracemalloc.start()
+    try:
+        with pytest.raises(gif2numpy.ResourceLimitError, match=message):
+            READERS[reader](gif, limits)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 1 << 20
+    if reader == "stream" and case in ("frames", "decoded_bytes"):
+        # a stream decodes the images which arrived before the one exceeding the limit
+        assert len(decompressed) < FRAMES
+    else:
+        assert not decompressed
+
+
+@pytest.mark.parametrize("reader", sorted(READERS))
+def test_time_limit(reader):
+    with pytest.raises(gif2numpy.ResourceLimitError, match="time limit"):
+        READERS[reader](frames_gif(), gif2numpy.Limits(seconds=0))
+
+
+@pytest.mark.parametrize("reader", sorted(READERS))
+def test_within_limits(reader):
+    limits = gif2numpy.Limits(pixels=64, frames=FRAMES, decoded_bytes=256 * FRAMES, seconds=60)
+    READERS[reader](frames_gif(), limits)
+
+
+def test_resource_limit_error_is_value_error():
+    assert issubclass(gif2numpy.ResourceLimitError, ValueError)
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import struct
+import numpy as np
+import pytest
+import gif2numpy
+import numpy2gif
+
+# sha256 of the frames of convert in version 1.3, before the table-driven LZW decoder
+BASELINE_DIGESTS = {
+    "Rotating_earth.gif": (44, "39008ab9ae5c9d4f5615ed36a428518d408a1bb1c396539defbad6615ecd7452"),
+    "audrey.gif": (1, "ec2d5a65ca7811548b6a287e3e77fff948397b57f5b9a08ec49d40d5f8d70247"),
+    "hopper.gif": (1, "2a5dfc30d3a651a494601a60b433d8f178ca855f6134e2e356dfa84d97138026"),
+    "testcolors.gif": (1, "ec4d34994c108d1bcd720f925b98f3114c6f7a11e93b8253163c740f56082b2b"),
+}
+
+
+def frames_digest(frames):
+    digest = hashlib.sha256()
+    for frame in frames:
+        digest.update(np.ascontiguousarray(frame).tobytes())
+    return digest.hexdigest()
+
+
+def test_convert_output_is_unchanged(gif_filename):
+    frames = gif2numpy.convert(gif_filename)[0]
+    assert (len(frames), frames_digest(frames)) == BASELINE_DIGESTS[os.path.basename(gif_filename)]
+
+
+def test_table_engine_matches_list_engine(gif_filename):
+    frames, exts, image_specs = gif2numpy.convert(gif_filename, lzw_engine="table")
+    list_frames, list_exts, list_image_specs = gif2numpy.convert(gif_filename, lzw_engine="list")
+    assert len(frames) == len(list_frames)
+    for frame, list_frame in zip(frames, list_frames):
+        assert np.array_equal(frame, list_frame)
+    assert exts == list_exts
+    assert image_specs == list_image_specs
+
+
+@pytest.mark.parametrize("lzw_min", [2, 3, 4, 8])
+def test_lzw_round_trip(lzw_min):
+    rng = np.random.RandomState(lzw_min)
+    # long enough to fill the code table and clear it several times
+    indices = rng.randint(0, 1 << lzw_min, size=20000).astype(np.uint8)
+    indices[5000:9000] = 1
+    data = numpy2gif.lzw_compress(indices.tolist(), lzw_min)
+    assert np.array_equal(gif2numpy.lzw_decode(data, lzw_min, len(indices)), indices)
+    assert gif2numpy.lzw_decompress(data, lzw_min) == indices.tolist()
+
+
+def lzw_min_gif(lzw_min, data):
+    "returns a 4x4 gif with a two color global color table and the LZW data of lzw_min"
+    return (numpy2gif.header() + numpy2gif.logical_screen(4, 4, 1) + b"\x00\x00\x00\xff\xff\xff"
+            + struct.pack("<BHHHHB", 0x2C, 0, 0, 4, 4, 0) + bytes(bytearray([lzw_min]))
+            + numpy2gif.pack_subblocks(data) + numpy2gif.trailer())
+
+
+def pack_codes(codes, code_size):
+    "packs the codes of code_size bits into bytes, least significant bit first"
+    value = sum(code << (i * code_size) for i, code in enumerate(codes))
+    return struct.pack("<Q", value)[:-(-len(codes) * code_size // 8)]
+
+
+@pytest.mark.parametrize("lzw_min", [0, 1])
+def test_small_lzw_min_code_size_terminates(lzw_min):
+    # the code size stays lzw_min + 1 bits, as the code table starts beyond its first increase
+    indices = [i % 2 if lzw_min else 0 for i in range(16)]
+    gif = lzw_min_gif(lzw_min, pack_codes([1 << lzw_min] + indices, lzw_min + 1) + b"\xff" * 8)
+    frames = gif2numpy.convert(gif, lzw_engine="table", BGR2RGB=False)[0]
+    list_frames = gif2numpy.convert(gif, lzw_engine="list", BGR2RGB=False)[0]
+    assert np.array_equal(frames[0], list_frames[0])
+    assert np.array_equal(frames[0][..., 0], 255 * np.reshape(indices, (4, 4)))
+
+
+@pytest.mark.parametrize("lzw_engine", ["table", "list"])
+@pytest.mark.parametrize("lzw_min", [12, 20, 255])
+def test_large_lzw_min_code_size_is_rejected(lzw_min, lzw_engine):
+    with pytest.raises(ValueError, match="LZW minimum code size"):
+        gif2numpy.convert(lzw_min_gif(lzw_min, b"\x00" * 8), lzw_engine=lzw_engine)
+
+
+def test_numpy2gif_round_trip(gif_filename):
+    frames, exts, image_specs = gif2numpy.convert(gif_filename)
+    frames = frames[:5]
+    distinct = np.unique(np.concatenate([frame.reshape(-1, 3) for frame in frames]), axis=0)
+    if len(distinct) > 256:
+        pytest.skip("more than 256 colors, the palette is quantized")
+    # by default pixels of the transparent index 0, which numpy2gif writes without flag, come from the frame before
+    decoded = gif2numpy.convert(numpy2gif.convert(frames), disposal=True)[0]
+    assert len(decoded) == len(frames)
+    for frame, decoded_frame in zip(frames, decoded):
+        assert np.array_equal(frame, decoded_frame)
@@ -0,0 +1,23 @@
+import numpy as np
+import gif2numpy
+
+
+def test_metadata_matches_probe(gif_source):
+    exts, image_specs = gif2numpy.probe(gif_source)
+    meta = gif2numpy.metadata(gif_source)
+    assert meta.to_exts() == exts
+    assert meta.to_image_specs() == image_specs
+    assert len(meta.frames) == image_specs["Frame count"]
+    assert meta.frames.dtype == gif2numpy.FRAME_DTYPE
+    assert meta.frames.dtype.itemsize == 18
+
+
+def test_metadata_frames(gif_source):
+    meta = gif2numpy.metadata(gif_source)
+    index = gif2numpy.index_frames(gif_source)
+    assert meta.frames["disposal"].tolist() == index.disposals
+    assert meta.frames["transparent"].tolist() == index.transparent
+    assert meta.frames["has_gce"].tolist() == [offset >= 0 for offset in index.gce_offsets]
+    frames = [frame for frame, ext in gif2numpy.iter_frames(gif_source, indexed=True)]
+    assert np.array_equal(meta.frames["width"], [frame.shape[1] for frame in frames])
+    assert np.array_equal(meta.frames["height"], [frame.shape[0] for frame in frames])
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import gif2numpy
+import numpy2gif
+
+
+def frames(count, shape=(6, 5)):
+    rng = np.random.RandomState(1)
+    return [rng.randint(0, 4, size=shape + (3,)).astype(np.uint8) * 60 for i in range(count)]
+
+
+@pytest.mark.parametrize("delay_time", [7, np.int64(7), np.array(7)])
+def test_scalar_delay_time(delay_time):
+    exts = gif2numpy.convert(numpy2gif.convert(frames(3), delay_time=delay_time))[1]
+    assert [ext["delay_time"] for ext in exts] == [7, 7, 7]
+
+
+def test_delay_time_sequence_from_decoded_file():
+    gif = numpy2gif.convert(frames(3), delay_time=[5, 10, 20])
+    delays = gif2numpy.metadata(gif).frames["delay"]
+    again = numpy2gif.convert(gif2numpy.convert(gif, disposal=True)[0], delay_time=delays)
+    assert [ext["delay_time"] for ext in gif2numpy.convert(again)[1]] == [5, 10, 20]
+    assert numpy2gif.convert(frames(3), delay_time=delays[0]) == numpy2gif.convert(frames(3), delay_time=5)
+
+
+@pytest.mark.parametrize("delay_time", [[10, 20], [10] * 6, []])
+def test_delay_time_length_must_match(delay_time):
+    with pytest.raises(ValueError, match="delay times"):
+        numpy2gif.convert(frames(5), delay_time=delay_time)
+
+
+@pytest.mark.parametrize("shape", [(0, 0), (0, 4), (3, 0)])
+@pytest.mark.parametrize("optimize", [False, True])
+def test_empty_frames(shape, optimize):
+    decoded = gif2numpy.convert(numpy2gif.convert(frames(2, shape), optimize=optimize))[0]
+    assert [frame.shape for frame in decoded] == [shape + (3,)] * 2
+
+
+def test_lzw_compress_empty():
+    for lzw_min in (2, 8):
+        assert gif2numpy.lzw_decode(numpy2gif.lzw_compress([], lzw_min), lzw_min, 0).size == 0
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import gif2numpy
+from conftest import disposal_gif
+
+
+@pytest.mark.parametrize("scale", [2, 3, 5])
+@pytest.mark.parametrize("disposal", [False, True])
+def test_scale_subsamples_full_frames(gif_source, scale, disposal):
+    full = gif2numpy.convert(gif_source, disposal=disposal)[0]
+    reduced = gif2numpy.convert(gif_source, disposal=disposal, scale=scale)[0]
+    assert len(reduced) == len(full)
+    for frame, full_frame in zip(reduced, full):
+        assert np.array_equal(frame, full_frame[::scale, ::scale])
+
+
+@pytest.mark.parametrize("max_size", [1, 3, 100])
+def test_max_size(gif_source, max_size):
+    full = gif2numpy.convert(gif_source)[0]
+    scale = -(-max(full[0].shape[:2]) // max_size)
+    reduced = gif2numpy.convert(gif_source, max_size=max_size)[0]
+    assert max(reduced[0].shape[:2]) <= max_size
+    for frame, full_frame in zip(reduced, full):
+        assert np.array_equal(frame, full_frame[::scale, ::scale])
+
+
+def test_thumbnail(gif_source):
+    full = gif2numpy.convert(gif_source)[0]
+    scale = -(-max(full[0].shape[:2]) // 4)
+    thumbnails = gif2numpy.thumbnail(gif_source, max_size=4)
+    assert len(thumbnails) == 1
+    assert np.array_equal(thumbnails[0], full[0][::scale, ::scale])
+    thumbnails = gif2numpy.thumbnail(gif_source, max_size=4, step=3)
+    assert len(thumbnails) == len(full[::3])
+    for frame, full_frame in zip(thumbnails, full[::3]):
+        assert np.array_equal(frame, full_frame[::scale, ::scale])
+
+
+@pytest.mark.parametrize("options", [{"scale": 0}, {"max_size": 0}])
+def test_invalid_reduction(options):
+    with pytest.raises(ValueError):
+        gif2numpy.convert(disposal_gif(), **options)
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+import gif2numpy
+from conftest import disposal_gif, make_gif
+
+
+def keyframe_gif():
+    # no frame has a graphic control extension, so every frame is a keyframe
+    rng = np.random.RandomState(0)
+    return make_gif([(0, 0, rng.randint(0, 4, size=(8, 8)), None) for i in range(9)])
+
+
+def selected_frames(frame_count, selection):
+    selected = list(range(frame_count))[::selection.get("step", 1)]
+    return selection.get("frames", selected)[:selection.get("max_frames")]
+
+
+@pytest.mark.parametrize("selection", [{"frames": [5]}, {"step": 3}, {"frames": [0, 7]}, {"max_frames": 2}])
+@pytest.mark.parametrize("gif", [keyframe_gif(), disposal_gif()], ids=["keyframes", "disposal"])
+def test_selection_with_lzw_workers(gif, selection):
+    frames = gif2numpy.convert(gif)[0]
+    with ThreadPoolExecutor(2) as executor:
+        decoded = gif2numpy.convert(gif, lzw_workers=executor, **selection)[0]
+    selected = selected_frames(len(frames), selection)
+    assert len(decoded) == len(selected)
+    for n, frame in zip(selected, decoded):
+        assert np.array_equal(frame, frames[n])
+
+
+def test_selection_with_worker_processes():
+    gif = keyframe_gif()
+    frames = gif2numpy.convert(gif)[0]
+    decoded = gif2numpy.convert(gif, lzw_workers=2, frames=[0, 7])[0]
+    assert np.array_equal(decoded[0], frames[0]) and np.array_equal(decoded[1], frames[7])
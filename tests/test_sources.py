@@ -0,0 +1,68 @@
+import io
+import numpy as np
+import pytest
+import gif2numpy
+
+
+def assert_same_frames(frames, expected):
+    assert len(frames) == len(expected)
+    assert all(np.array_equal(frame, expected_frame) for frame, expected_frame in zip(frames, expected))
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_sources(gif_filename, use_mmap):
+    frames, exts, image_specs = gif2numpy.convert(gif_filename)
+    with open(gif_filename, "rb") as gif_file:
+        data = gif_file.read()
+    sources = [lambda: gif_filename, lambda: open(gif_filename, "rb"), lambda: io.BytesIO(data),
+               lambda: data, lambda: bytearray(data), lambda: memoryview(data)]
+    for source in sources:
+        gif_source = source()
+        result = gif2numpy.convert(gif_source, use_mmap=use_mmap)
+        if hasattr(gif_source, "close"):
+            gif_source.close()
+        assert_same_frames(result[0], frames)
+        assert result[1:] == (exts, image_specs)
+
+
+READERS = {
+    "probe": (gif2numpy.probe, lambda result: result),
+    "metadata": (gif2numpy.metadata, lambda meta: (meta.to_exts(), meta.to_image_specs())),
+    "index_frames": (gif2numpy.index_frames, lambda index: index.to_dict()),
+}
+
+
+@pytest.mark.parametrize("reader", sorted(READERS))
+def test_use_mmap_with_file_name_and_object(gif_filename, reader):
+    function, fields = READERS[reader]
+    expected = fields(function(gif_filename))
+    assert fields(function(gif_filename, use_mmap=True)) == expected
+    with open(gif_filename, "rb") as gif_file:
+        assert fields(function(gif_file, use_mmap=True)) == expected
+
+
+def test_decode_frame_use_mmap(gif_filename):
+    frames = gif2numpy.convert(gif_filename)[0]
+    n = len(frames) - 1
+    assert np.array_equal(gif2numpy.decode_frame(gif_filename, n, use_mmap=True)[0], frames[n])
+    with open(gif_filename, "rb") as gif_file:
+        assert np.array_equal(gif2numpy.decode_frame(gif_file, n, use_mmap=True)[0], frames[n])
+
+
+def test_mmap_falls_back_for_bytes_io(gif_filename):
+    with open(gif_filename, "rb") as gif_file:
+        data = gif_file.read()
+    # BytesIO has no file descriptor to map, it is read instead
+    assert_same_frames(gif2numpy.convert(io.BytesIO(data), use_mmap=True)[0], gif2numpy.convert(data)[0])
+
+
+def test_mmap_of_empty_file(tmp_path):
+    filename = tmp_path / "empty.gif"
+    filename.write_bytes(b"")
+    # an empty file cannot be mapped, it is read and rejected like any other non-gif data
+    for use_mmap in (False, True):
+        with pytest.raises(ValueError, match="Not a gif image"):
+            gif2numpy.convert(str(filename), use_mmap=use_mmap)
+        with open(str(filename), "rb") as gif_file:
+            with pytest.raises(ValueError, match="Not a gif image"):
+                gif2numpy.convert(gif_file, use_mmap=use_mmap)
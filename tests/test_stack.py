@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+import gif2numpy
+
+
+@pytest.mark.parametrize("disposal", [False, True])
+def test_stack_matches_frames(gif_source, disposal):
+    frames = gif2numpy.convert(gif_source, disposal=disposal)[0]
+    stacked, exts, image_specs = gif2numpy.convert(gif_source, disposal=disposal, stack=True)
+    assert isinstance(stacked, np.ndarray)
+    assert stacked.shape == (len(frames),) + frames[0].shape
+    assert stacked.dtype == np.uint8
+    assert np.array_equal(stacked, np.stack(frames))
+
+
+def test_stack_to_npy_file(gif_source, tmp_path):
+    filename = str(tmp_path / "frames.npy")
+    frames = gif2numpy.convert(gif_source)[0]
+    stacked = gif2numpy.convert(gif_source, stack=filename)[0]
+    assert isinstance(stacked, np.memmap)
+    # the frames are flushed to the file when convert returns
+    loaded = np.load(filename, mmap_mode="r")
+    assert loaded.shape == (len(frames),) + frames[0].shape
+    assert np.array_equal(loaded, np.stack(frames))
+
+
+@pytest.mark.parametrize("options", [{"frames": [0, 3, 5]}, {"step": 2}, {"max_frames": 2}, {"scale": 2},
+                                     {"frames": [0, 4], "scale": 3, "disposal": True}])
+def test_stack_with_selection_and_scale(gif_source, options):
+    frames = gif2numpy.convert(gif_source, **options)[0]
+    stacked = gif2numpy.convert(gif_source, stack=True, **options)[0]
+    assert stacked.shape == (len(frames),) + frames[0].shape
+    assert np.array_equal(stacked, np.stack(frames))
@@ -0,0 +1,33 @@
+import pytest
+import gif2numpy
+
+
+@pytest.mark.parametrize("disposal", [False, True])
+def test_records_and_callback_per_frame(gif_source, disposal):
+    called = []
+    stats = gif2numpy.DecodeStats(callback=called.append)
+    frames = gif2numpy.convert(gif_source, stats=stats, disposal=disposal)[0]
+    assert len(stats.frames) == len(frames)
+    assert called == stats.frames
+    assert [record["frame"] for record in stats.frames] == list(range(len(frames)))
+    for record in stats.frames:
+        assert all(record[stage] >= 0 for stage in gif2numpy.DecodeStats.stages)
+    totals = stats.totals()
+    assert totals["frames"] == len(frames)
+    assert totals["bytes_out"] == sum(record["bytes_out"] for record in stats.frames)
+
+
+def test_lzw_counters_of_table_engine(gif_source):
+    stats = gif2numpy.DecodeStats()
+    frames, exts, image_specs = gif2numpy.convert(gif_source, stats=stats, lzw_engine="table")
+    for record, ext in zip(stats.frames, (ext for frame, ext in gif2numpy.iter_frames(gif_source))):
+        assert record["bytes_out"] == ext["width"] * ext["height"]
+        # every code takes from lzw_min + 1 to 12 bits, each data stream starts with a clear code
+        assert record["bytes_in"] * 8 // 12 <= record["codes"] <= record["bytes_in"] * 8 // (ext["lzw_min"] + 1)
+        assert record["clears"] >= 1
+
+
+def test_list_engine_does_not_count_codes(gif_source):
+    stats = gif2numpy.DecodeStats()
+    gif2numpy.convert(gif_source, stats=stats, lzw_engine="list")
+    assert all(record["bytes_out"] > 0 and record["codes"] == 0 for record in stats.frames)
@@ -0,0 +1,128 @@
+import asyncio
+import struct
+import numpy as np
+import pytest
+import gif2numpy
+import numpy2gif
+from conftest import IMAGES, PALETTE, disposal_gif, make_gif
+
+APPLICATION = b"\x21\xFF\x0bNETSCAPE2.0\x03\x01\x00\x00\x00"
+COMMENT = b"\x21\xFE\x05hello\x03abc\x00"
+PLAIN_TEXT = b"\x21\x01\x0c" + bytes(12) + b"\x02hi\x00"
+
+
+def local_image(indices, flags, left=0, top=0):
+    "returns an image with a local color table of 4 colors and the extra flags, e.g. 0x40 for interlaced"
+    image = numpy2gif.image(np.asarray(indices, dtype=np.uint8), 2, left, top)
+    return image[:9] + bytes(bytearray([0x80 | flags | 1])) + PALETTE[::-1].tobytes() + image[10:]
+
+
+def block_gif():
+    """a gif with every kind of block: application, comment, plain text and unknown extensions,
+       images with the global and with a local color table, an interlaced image and the trailer"""
+    rng = np.random.RandomState(3)
+    gif = disposal_gif()
+    images = [local_image(rng.randint(0, 4, size=(8, 8)), 0), local_image(rng.randint(0, 4, size=(5, 6)), 0x40, 1, 2)]
+    gce = struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 1, 10, 0, 0)
+    return (gif[:25] + APPLICATION + COMMENT + gif[25:-1] + PLAIN_TEXT + b"\x21\x99\x01x\x00"
+            + gce + images[0] + COMMENT + images[1] + b"\x3B")
+
+
+def feed_chunks(data, size, **decoder_kwargs):
+    decoder = gif2numpy.StreamDecoder(**decoder_kwargs)
+    decoded = []
+    for pos in range(0, len(data), size):
+        decoded.extend(decoder.feed(data[pos:pos+size]))
+    decoded.extend(decoder.close())
+    return decoded, decoder
+
+
+def assert_matches_convert(decoded, gif, **convert_kwargs):
+    frames = gif2numpy.convert(gif, **convert_kwargs)[0]
+    # convert gives no ext of its own to frames without graphic control extension, iter_frames does
+    exts = [ext for frame, ext in gif2numpy.iter_frames(gif, **convert_kwargs)]
+    assert len(decoded) == len(frames)
+    for (frame, ext), expected, expected_ext in zip(decoded, frames, exts):
+        assert np.array_equal(frame, expected)
+        assert ext == expected_ext
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 25, 64, 1 << 20])
+@pytest.mark.parametrize("disposal", [False, True])
+def test_chunks_match_convert(size, disposal):
+    gif = block_gif()
+    decoded, decoder = feed_chunks(gif, size, disposal=disposal)
+    assert_matches_convert(decoded, gif, disposal=disposal)
+    assert decoder.image_specs == gif2numpy.convert(gif)[2]
+
+
+@pytest.mark.parametrize("size", [997, 1 << 16])
+def test_images_match_convert(gif_filename, size):
+    with open(gif_filename, "rb") as gif_file:
+        gif = gif_file.read()
+    assert_matches_convert(feed_chunks(gif, size)[0], gif)
+
+
+def test_data_after_trailer_is_ignored():
+    gif = block_gif()
+    decoder = gif2numpy.StreamDecoder()
+    decoded = decoder.feed(gif + b"\x2C\x00garbage")
+    assert decoder.feed(b"more garbage") == []
+    assert decoder.close() == []
+    assert_matches_convert(decoded, gif)
+
+
+def test_close_decodes_cut_off_image():
+    gif = disposal_gif()
+    frames = gif2numpy.convert(gif)[0]
+    # the last image ends with its data sub-block, its terminator and the trailer
+    cut = len(gif) - 4
+    decoder = gif2numpy.StreamDecoder()
+    decoded = decoder.feed(gif[:cut])
+    assert len(decoded) == len(frames) - 1
+    last = decoder.close()
+    assert len(last) == 1
+    assert last[0][0].shape == frames[-1].shape
+    assert decoder.feed(gif[cut:]) == []
+    with pytest.raises(ValueError, match="Truncated gif image"):
+        gif2numpy.convert(gif[:cut])
+
+
+def test_close_without_header():
+    decoder = gif2numpy.StreamDecoder()
+    decoder.feed(b"GI")
+    with pytest.raises(ValueError, match="Not a gif image"):
+        decoder.close()
+
+
+async def chunk_source(data, size, error=None):
+    for pos in range(0, len(data), size):
+        await asyncio.sleep(0)
+        yield data[pos:pos+size]
+    if error is not None:
+        raise error
+
+
+async def collect(chunks, **decoder_kwargs):
+    return [frame_ext async for frame_ext in gif2numpy.decode_stream(chunks, **decoder_kwargs)]
+
+
+@pytest.mark.parametrize("size", [1, 100, 1 << 20])
+def test_decode_stream(size):
+    gif = block_gif()
+    assert_matches_convert(asyncio.run(collect(chunk_source(gif, size), disposal=True)), gif, disposal=True)
+
+
+def test_decode_stream_decoding_error():
+    with pytest.raises(ValueError, match="Not a gif image"):
+        asyncio.run(collect(chunk_source(b"PNG image" * 10, 7)))
+
+
+def test_decode_stream_chunk_error():
+    async def frames_before_error():
+        decoded = []
+        with pytest.raises(ConnectionResetError):
+            async for frame_ext in gif2numpy.decode_stream(chunk_source(block_gif()[:-30], 50, ConnectionResetError())):
+                decoded.append(frame_ext)
+        return decoded
+    assert len(asyncio.run(frames_before_error())) > 0
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+import gif2numpy
+from conftest import make_gif
+
+APPLICATION = b"\x21\xFF\x0bNETSCAPE2.0\x03\x01\x00\x00\x00"
+COMMENT = b"\x21\xFE\x03abc\x00"
+
+
+def block_gif():
+    """a gif with every kind of block, the extensions after the 25 bytes of header and color table"""
+    full = np.arange(64).reshape(8, 8) % 4
+    gif = make_gif([(0, 0, full, (1, 0, 0)), (2, 2, np.full((4, 4), 2), (0, 1, 0))])
+    return gif[:25] + APPLICATION + COMMENT + gif[25:]
+
+
+def block_ends(gif):
+    ends = [25]
+    for label, offset, value in gif2numpy.BlockScanner(gif).iter_blocks():
+        ends.append(offset)
+    return ends
+
+
+@pytest.mark.parametrize("reader", [gif2numpy.convert, gif2numpy.probe, gif2numpy.metadata, gif2numpy.index_frames,
+                                    lambda gif: gif2numpy.convert(gif, disposal=True)],
+                         ids=["convert", "probe", "metadata", "index_frames", "disposal"])
+def test_truncated_gif_raises_value_error(reader):
+    gif = block_gif()
+    ends = block_ends(gif)
+    for cut in range(3, len(gif)):
+        if cut in ends:
+            reader(gif[:cut])
+        else:
+            with pytest.raises(ValueError, match="Truncated gif image"):
+                reader(gif[:cut])
+
+
+def test_missing_trailer_decodes_complete_blocks():
+    gif = block_gif()
+    frames = gif2numpy.convert(gif[:-1])[0]
+    assert len(frames) == 2
+    assert all(np.array_equal(a, b) for a, b in zip(frames, gif2numpy.convert(gif)[0]))